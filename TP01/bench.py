@@ -0,0 +1,124 @@
+"""Compares the recursive and iterative solvers on growing box sizes.
+
+For every size n, the position (n, n) is solved with Tara moving first and
+the number of solver calls and wall time are reported. Every solver counts
+calls the same way: the first position and every child position tried,
+including the ones answered from a cache and the empty boxes.
+The plain recursive solvers are exponential, so they only run up to
+EXPONENTIAL_MAX. Any solver that takes too long or overflows the recursion
+limit stops being run for the bigger sizes.
+
+Run with `python bench.py [max size]`."""
+
+import importlib
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import tp01
+
+# tp01-2.py can not be imported by name because of the dash
+tp01_2 = importlib.import_module("tp01-2")
+
+SIZES = (2, 4, 6, 8, 10, 12, 25, 50, 100, 200, 400, 800, 1600, 3200)
+
+# Biggest size the solvers without memoization are run on
+EXPONENTIAL_MAX = 10
+
+# Skip a solver for bigger sizes once a single run gets this slow (seconds)
+TIME_LIMIT = 5.0
+
+
+def run_game(n: int, tt: Optional[tp01.TranspositionTable] = None) -> int:
+    """Recursive `game` from tp01.py, counted by wrapping the global name"""
+    original = tp01.game
+    calls = 0
+
+    def counted(*args):
+        nonlocal calls
+        calls += 1
+        return original(*args)
+
+    tp01.game = counted  # type: ignore
+    try:
+        counted("Tara", n, n, tt)
+    finally:
+        tp01.game = original
+    return calls
+
+
+def run_game_2(n: int) -> int:
+    """Recursive `game` from tp01-2.py, which counts itself"""
+    tp01_2.c = 0
+    tp01_2.game("Tara", n, n)
+    return tp01_2.c
+
+
+def run_game_tt(n: int) -> int:
+    """Recursive `game` from tp01.py with a transposition table"""
+    return run_game(n, tp01.TranspositionTable())
+
+
+def run_game_2_tt(n: int) -> int:
+    """Recursive `game` from tp01-2.py with a transposition table"""
+    tp01_2.c = 0
+    tp01_2.game("Tara", n, n, tp01.TranspositionTable())
+    return tp01_2.c
+
+
+def run_iterative(n: int) -> int:
+    """Explicit stack solver from tp01.py"""
+    solver = tp01.IterativeSolver()
+    solver.winner("Tara", n, n)
+    return solver.calls
+
+
+# Name -> (solver, biggest size to run it on)
+SOLVERS: Dict[str, Tuple[Callable[[int], int], Optional[int]]] = {
+    "tp01": (run_game, EXPONENTIAL_MAX),
+    "tp01-2": (run_game_2, EXPONENTIAL_MAX),
+    "tp01+tt": (run_game_tt, None),
+    "tp01-2+tt": (run_game_2_tt, None),
+    "iterative": (run_iterative, None),
+}
+
+
+def measure(solver: Callable[[int], int], n: int) -> Tuple[int, float]:
+    """Returns (calls, seconds) of one run"""
+    start = time.perf_counter()
+    calls = solver(n)
+    return calls, time.perf_counter() - start
+
+
+def main():
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+
+    print(f"{'n':>6}", *(f"{name:>24}" for name in SOLVERS))
+    active = dict(SOLVERS)
+    for n in SIZES:
+        if n > max_size:
+            break
+
+        cells = []
+        for name, (solver, solver_max) in SOLVERS.items():
+            if solver_max is not None and n > solver_max:
+                active.pop(name, None)
+
+            result: Optional[str] = None
+            if name not in active:
+                result = "-"
+            else:
+                try:
+                    calls, secs = measure(solver, n)
+                    result = f"{calls} / {secs:.4f}s"
+                    if secs > TIME_LIMIT:
+                        del active[name]
+                except RecursionError:
+                    result = "RecursionError"
+                    del active[name]
+            cells.append(f"{result:>24}")
+        print(f"{n:>6}", *cells)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""On-disk outcome table for the bead game, read through mmap.
+
+The file stores the winner of every position in a (max_left + 1) by
+(max_right + 1) rectangle, with two bits per (left, right, first player):
+0 for unknown, 1 if Tara wins and 2 if Kenneth wins. Tara's two bits are the
+low half of a nibble and Kenneth's the high half, so a position is exactly
+one nibble.
+
+Positions are laid out by diagonal (same left + right), which is the order
+`OutcomeTable` produces them in, so a whole diagonal can be encoded at once
+with string operations instead of one position at a time. Each diagonal is
+padded to a whole byte, and inside a byte the first position is the high
+nibble.
+
+File layout:
+    MAGIC, then max_left and max_right as little endian uint32
+    every diagonal from 0 to max_left + max_right, clipped to the rectangle"""
+
+import mmap
+import os
+import struct
+from typing import List, Optional
+
+from tp01 import OutcomeTable, Player
+
+MAGIC = b"TP01OUT1"
+HEADER = struct.Struct("<8sII")
+
+# Two bit codes of a winner
+UNKNOWN, TARA, KENNETH = 0, 1, 2
+
+# Nibble of a position where the player to move wins / loses
+_WIN_NIBBLE = TARA | KENNETH << 2
+_LOSE_NIBBLE = KENNETH | TARA << 2
+
+# Losing bit ("0" / "1") to hex digit of the nibble
+_TO_HEX = str.maketrans("01", f"{_WIN_NIBBLE:x}{_LOSE_NIBBLE:x}")
+
+
+def _diagonal_bounds(total: int, max_left: int, max_right: int):
+    """Range of left values of a diagonal inside the rectangle"""
+    return max(0, total - max_right), min(total, max_left)
+
+
+def _diagonal_offsets(max_left: int, max_right: int) -> List[int]:
+    """Byte offset of every diagonal, plus the end of the file"""
+    offsets = [HEADER.size]
+    for total in range(max_left + max_right + 1):
+        low, high = _diagonal_bounds(total, max_left, max_right)
+        offsets.append(offsets[-1] + (high - low + 2) // 2)
+    return offsets
+
+
+def write_table(path: str, max_left: int, max_right: int):
+    """Solves and writes the whole rectangle to path"""
+    table = OutcomeTable(max_left, max_right)
+
+    # Write somewhere else first, so a reader never sees half a file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, max_left, max_right))
+        for total in range(max_left + max_right + 1):
+            low, high = _diagonal_bounds(total, max_left, max_right)
+            count = high - low + 1
+
+            # Bits low..high of the diagonal, first position first
+            losing = (table.diagonal(total) >> low) & ((1 << count) - 1)
+            digits = format(losing, f"0{count}b")[::-1].translate(_TO_HEX)
+            if count % 2:
+                digits += "0"
+            f.write(bytes.fromhex(digits))
+
+    os.replace(tmp_path, path)
+
+
+class OutcomeCache:
+    """Outcome table answered straight from the file at path.
+
+    The file is created on first use, and rebuilt bigger whenever a query
+    falls outside of it. Later runs only map the file, nothing is solved."""
+
+    def __init__(self, path: str, max_left: int = 0, max_right: int = 0):
+        self.path = path
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self.max_left = self.max_right = -1
+        self._offsets: List[int] = []
+
+        if os.path.exists(path):
+            self._open()
+        self.ensure(max_left, max_right)
+
+    def _open(self):
+        """Maps the file and reads its header"""
+        self.close()
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, max_left, max_right = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an outcome cache")
+
+        self.max_left, self.max_right = max_left, max_right
+        self._offsets = _diagonal_offsets(max_left, max_right)
+        if len(self._map) != self._offsets[-1]:
+            raise ValueError(f"{self.path} is truncated")
+
+    def close(self):
+        """Unmaps and closes the file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def ensure(self, max_left: int, max_right: int):
+        """Grows the file, if needed, to cover the given rectangle"""
+        if max_left <= self.max_left and max_right <= self.max_right:
+            return
+
+        # Grow the dimensions that overflowed at least twice as big, so a
+        # stream of slightly bigger queries does not rebuild the file every
+        # time, and leave the other one as is
+        new_left, new_right = self.max_left, self.max_right
+        if max_left > self.max_left:
+            new_left = max(max_left, 2 * self.max_left)
+        if max_right > self.max_right:
+            new_right = max(max_right, 2 * self.max_right)
+
+        self.close()
+        write_table(self.path, new_left, new_right)
+        self._open()
+
+    def get(self, current: Player, left: int, right: int) -> int:
+        """Two bit code of the winner, UNKNOWN if out of the stored bounds"""
+        if left > self.max_left or right > self.max_right:
+            return UNKNOWN
+
+        total = left + right
+        low, _ = _diagonal_bounds(total, self.max_left, self.max_right)
+        index = left - low
+        byte = self._map[self._offsets[total] + index // 2]  # type: ignore
+        nibble = byte & 0xF if index % 2 else byte >> 4
+        return nibble >> 2 & 3 if current == "Kenneth" else nibble & 3
+
+    def winner(self, current: Player, left: int, right: int) -> Player:
+        """Same as `game`, answered from the file"""
+        code = self.get(current, left, right)
+        if code == UNKNOWN:
+            self.ensure(left, right)
+            code = self.get(current, left, right)
+        return "Tara" if code == TARA else "Kenneth"
@@ -0,0 +1,307 @@
+"""Generalized take-away game over any number of boxes.
+
+A move set is a sequence of moves, each move is a tuple with how many beads
+it takes from every box, e.g. TP01's rules for two boxes are `TP01_MOVES`.
+The player who takes the last bead wins, same as in tp01.py.
+
+Boxes that never appear together in a move are independent games, so the
+boxes are split into groups of boxes linked by some move and every group is
+solved on its own for its Grundy value. The position is winning for the
+player to move if the XOR of all groups' values is not zero.
+
+Inside a group a position is packed into one integer, with `bits` bits per
+box plus a guard bit above each box. Subtracting a packed move then both
+applies the move and tells if it was legal: a box that goes below zero
+borrows its guard bit, so a legal move is one that keeps every guard bit.
+
+Groups whose moves do not care about the order of the boxes (like
+`tp01_moves`) are solved on the number of boxes with each count instead, and
+a move is only tried once per distinct count it takes from, as taking from
+any of the boxes with the same count leads to the same position."""
+
+from itertools import combinations, combinations_with_replacement, product
+from typing import Dict, List, Literal, Sequence, Set, Tuple
+
+Player = Literal["Kenneth", "Tara"]
+Move = Tuple[int, ...]
+
+# Take 1 or 2 from either box, or 1 from both, see `game` in tp01.py
+TP01_MOVES: Tuple[Move, ...] = ((0, 2), (2, 0), (1, 1), (0, 1), (1, 0))
+
+
+def single_box_moves(boxes: int, amounts: Sequence[int]) -> Tuple[Move, ...]:
+    """Moves that take any of amounts from exactly one box"""
+    moves: List[Move] = []
+    for box in range(boxes):
+        for amount in amounts:
+            move = [0] * boxes
+            move[box] = amount
+            moves.append(tuple(move))
+    return tuple(moves)
+
+
+def tp01_moves(boxes: int) -> Tuple[Move, ...]:
+    """TP01's rules for any number of boxes: take 1 or 2 from one box, or
+    take 1 from each of any two boxes"""
+    both: List[Move] = []
+    for pair in combinations(range(boxes), 2):
+        both.append(tuple(int(box in pair) for box in range(boxes)))
+    return single_box_moves(boxes, (1, 2)) + tuple(both)
+
+
+def mex(values: Sequence[int]) -> int:
+    """Smallest non negative integer not in values"""
+    seen = set(values)
+    result = 0
+    while result in seen:
+        result += 1
+    return result
+
+
+class _Group:
+    """Boxes that share moves, solved together as one game"""
+
+    def __init__(self, boxes: List[int], moves: List[Move], bits: int):
+        self.boxes = boxes
+        self.bits = bits
+        self.width = bits + 1
+
+        # Moves restricted to our boxes, packed without guard bits
+        local_moves = {tuple(move[box] for box in boxes) for move in moves}
+        self.moves = [self.pack(move) for move in sorted(local_moves)]
+
+        # Guard bit of every box
+        self.guards = 0
+        for i in range(len(boxes)):
+            self.guards |= 1 << (i * self.width + bits)
+
+        # If the moves do not care about the order of the boxes, positions
+        # are solved as numbers of boxes per count instead, see
+        # _grundy_histogram
+        self.symmetric = len(boxes) > 1 and all(
+            tuple(move[i] for i in order) in local_moves
+            for move in local_moves
+            for order in self._swaps(len(boxes))
+        )
+
+        # Grundy value per packed position, with guards set
+        self.memo: Dict[int, int] = {self.guards: 0}
+
+        # Amounts every move takes, largest first, without the boxes it takes
+        # them from, and the Grundy value per histogram of counts, for
+        # symmetric groups
+        self.patterns = sorted(
+            {
+                tuple(sorted((take for take in move if take), reverse=True))
+                for move in local_moves
+            },
+            reverse=True,
+        )
+        self.histogram_memo: Dict[Tuple[int, ...], int] = {}
+
+    @staticmethod
+    def _swaps(size: int):
+        """Adjacent swaps, enough to generate every permutation"""
+        for i in range(size - 1):
+            order = list(range(size))
+            order[i], order[i + 1] = order[i + 1], order[i]
+            yield order
+
+    def pack(self, counts: Sequence[int]) -> int:
+        """Packs box counts into one integer, without guard bits"""
+        state = 0
+        for i, count in enumerate(counts):
+            state |= count << (i * self.width)
+        return state
+
+    def _children(self, state: Tuple[int, ...]) -> Set[Tuple[int, ...]]:
+        """Positions reachable in one move, as numbers of boxes per count"""
+        values = [count for count, boxes in enumerate(state) if boxes]
+
+        children = set()
+        for pattern in self.patterns:
+            # Which count each amount is taken from, boxes with the same
+            # count are interchangeable. Equal amounts are taken in any
+            # order, so only one order of the counts is needed.
+            if len(set(pattern)) == 1:
+                amount = pattern[0]
+                choices = combinations_with_replacement(
+                    [count for count in values if count >= amount], len(pattern)
+                )
+            else:
+                choices = product(
+                    *(
+                        [count for count in values if count >= amount]
+                        for amount in pattern
+                    )
+                )
+
+            if len(pattern) == 1:
+                # Single box moves, always legal
+                for (count,) in choices:
+                    child = list(state)
+                    child[count] -= 1
+                    child[count - pattern[0]] += 1
+                    children.add(tuple(child))
+                continue
+
+            for chosen in choices:
+                child = list(state)
+                for count in chosen:
+                    child[count] -= 1
+                # Not enough distinct boxes with some count
+                if min(child) < 0:
+                    continue
+                for count, amount in zip(chosen, pattern):
+                    child[count - amount] += 1
+                children.add(tuple(child))
+        return children
+
+    def _grundy_histogram(self, counts: Sequence[int]) -> int:
+        """Same as grundy, for symmetric groups"""
+        memo = self.histogram_memo
+        # Number of boxes with each count, from 0 to the largest count
+        histogram = [0] * (max(counts) + 1)
+        for count in counts:
+            histogram[count] += 1
+        root = tuple(histogram)
+
+        # Same walk as in grundy, children of the states waiting for theirs
+        # are kept to not generate them twice
+        waiting: Dict[Tuple[int, ...], Set[Tuple[int, ...]]] = {}
+        stack = [root]
+        while stack:
+            state = stack[-1]
+            if state in memo:
+                stack.pop()
+                continue
+
+            kids = waiting.pop(state, None)
+            if kids is None:
+                kids = self._children(state)
+
+            children = []
+            pending = False
+            for child in kids:
+                value = memo.get(child)
+                if value is None:
+                    stack.append(child)
+                    pending = True
+                elif not pending:
+                    children.append(value)
+
+            if pending:
+                waiting[state] = kids
+            else:
+                memo[state] = mex(children)
+                stack.pop()
+
+        return memo[root]
+
+    def grundy(self, counts: Sequence[int]) -> int:
+        """Grundy value of the group at counts"""
+        if self.symmetric:
+            return self._grundy_histogram(counts)
+
+        memo = self.memo
+        guards = self.guards
+        root = self.pack(counts) | guards
+
+        # Post-order walk on an explicit stack: a state is evaluated once
+        # all of its children have a value
+        stack = [root]
+        while stack:
+            state = stack[-1]
+            if state in memo:
+                stack.pop()
+                continue
+
+            children = []
+            pending = False
+            for move in self.moves:
+                child = state - move
+                if child & guards != guards:
+                    # Some box does not have enough beads
+                    continue
+
+                value = memo.get(child)
+                if value is None:
+                    stack.append(child)
+                    pending = True
+                elif not pending:
+                    children.append(value)
+
+            if not pending:
+                memo[state] = mex(children)
+                stack.pop()
+
+        return memo[root]
+
+
+class TakeAwayGame:
+    """Solver for a take-away game with a fixed number of boxes and moves"""
+
+    def __init__(self, moves: Sequence[Sequence[int]], bits: int = 16):
+        if not moves:
+            raise ValueError("Move set is empty")
+
+        self.boxes = len(moves[0])
+        self.bits = bits
+        for move in moves:
+            if len(move) != self.boxes:
+                raise ValueError("Every move must cover every box")
+            if any(take < 0 for take in move) or not any(move):
+                raise ValueError("Every move must take at least one bead")
+
+        # Union boxes that appear in the same move, each set is a group
+        parent = list(range(self.boxes))
+
+        def find(box: int) -> int:
+            while parent[box] != box:
+                parent[box] = parent[parent[box]]
+                box = parent[box]
+            return box
+
+        for move in moves:
+            touched = [box for box, take in enumerate(move) if take]
+            for box in touched[1:]:
+                parent[find(box)] = find(touched[0])
+
+        members: Dict[int, List[int]] = {}
+        for box in range(self.boxes):
+            members.setdefault(find(box), []).append(box)
+
+        self.groups: List[_Group] = []
+        for boxes in members.values():
+            group_moves = [tuple(move) for move in moves if any(move[b] for b in boxes)]
+            self.groups.append(_Group(boxes, group_moves, bits))
+
+    def grundy(self, counts: Sequence[int]) -> int:
+        """Grundy value of the whole position"""
+        if len(counts) != self.boxes:
+            raise ValueError(f"Expected {self.boxes} boxes, got {len(counts)}")
+        if any(count < 0 or count >> self.bits for count in counts):
+            raise ValueError(f"Box counts must be within 0 to {2**self.bits - 1}")
+
+        value = 0
+        for group in self.groups:
+            value ^= group.grundy([counts[box] for box in group.boxes])
+        return value
+
+    def is_winning(self, counts: Sequence[int]) -> bool:
+        """Check if the player to move wins"""
+        return self.grundy(counts) != 0
+
+    def winner(self, current: Player, counts: Sequence[int]) -> Player:
+        """Same as `game` in tp01.py, for any number of boxes"""
+        if self.is_winning(counts):
+            return current
+        return "Tara" if current == "Kenneth" else "Kenneth"
+
+
+if __name__ == "__main__":
+    # Same input as tp01.py, except the second line may have any number
+    # of boxes, played with `tp01_moves`
+    first: Player = input()  # type: ignore
+    counts = list(map(int, input().split()))
+    print(TakeAwayGame(tp01_moves(len(counts))).winner(first, counts))
@@ -0,0 +1,158 @@
+"""Instrumentation for the recursive searches of tp01.py and tp01-2.py.
+
+This runs the real `game` of either file, with or without a transposition
+table, while recording:
+
+- calls per depth (number of moves made so far)
+- which move proved a position winning, i.e. caused the cutoff
+- transposition table hits and misses
+- wall time per query
+- calls per (left, right) position, which can be dumped as a heatmap
+
+`game` itself is left untouched: `Profiler` swaps the module global `game`
+(which the search calls itself through) for a recording wrapper while a
+query runs, the same way bench.py counts calls. None of this costs anything
+unless the search is run through `Profiler`.
+
+Run with `python instrument.py [--solver NAME] [--tt] [--heatmap FILE]` and
+the same queries as `tp01.py --batch` on stdin."""
+
+import argparse
+import importlib
+import sys
+import time
+from collections import Counter
+from types import ModuleType
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import tp01
+from tp01 import MOVES, Player, TranspositionTable
+
+# Modules whose `game` can be profiled, tp01-2.py can not be imported by
+# name because of the dash
+SOLVERS: Dict[str, ModuleType] = {
+    "tp01": tp01,
+    "tp01-2": importlib.import_module("tp01-2"),
+}
+
+
+class Profiler:
+    """Runs the `game` of module and keeps statistics across queries"""
+
+    def __init__(self, module: ModuleType, tt: Optional[TranspositionTable] = None):
+        self.module = module
+        self.tt = tt
+
+        self.calls_by_depth: Counter = Counter()
+        self.cutoffs: Counter = Counter()
+        self.cost: Counter = Counter()
+        self.times: List[Tuple[Tuple[str, int, int], float]] = []
+
+    @property
+    def calls(self) -> int:
+        return sum(self.calls_by_depth.values())
+
+    def _search(self, current: Player, left: int, right: int) -> Player:
+        """Runs `game`, recording every call it makes"""
+        original = self.module.game
+        # Positions of the calls in progress, the root first
+        stack: List[Tuple[int, int]] = []
+
+        def recorded(
+            current: Player,
+            left: int,
+            right: int,
+            tt: Optional[TranspositionTable] = None,
+        ) -> Player:
+            self.calls_by_depth[len(stack)] += 1
+            self.cost[(left, right)] += 1
+
+            stack.append((left, right))
+            try:
+                winner = original(current, left, right, tt)
+            finally:
+                stack.pop()
+
+            # The player to move here lost, so the caller won with this
+            # move and stops trying the others
+            if stack and winner != current:
+                parent_left, parent_right = stack[-1]
+                self.cutoffs[(parent_left - left, parent_right - right)] += 1
+            return winner
+
+        self.module.game = recorded
+        try:
+            return recorded(current, left, right, self.tt)
+        finally:
+            self.module.game = original
+
+    def winner(self, current: Player, left: int, right: int) -> Player:
+        """Solves one query and records its time"""
+        start = time.perf_counter()
+        result = self._search(current, left, right)
+        self.times.append(((current, left, right), time.perf_counter() - start))
+        return result
+
+    def report(self, out: TextIO = sys.stdout):
+        """Writes a summary of everything recorded so far"""
+        calls = self.calls
+        out.write(f"calls: {calls}\n")
+
+        out.write("calls per depth:\n")
+        for depth in sorted(self.calls_by_depth):
+            out.write(f"    {depth}: {self.calls_by_depth[depth]}\n")
+
+        out.write("cutoffs per move (left, right):\n")
+        for move in MOVES:
+            out.write(f"    {move}: {self.cutoffs[move]}\n")
+
+        if self.tt is not None:
+            lookups = self.tt.hits + self.tt.misses
+            rate = self.tt.hits / lookups if lookups else 0.0
+            out.write(
+                f"memo: {self.tt.hits} hits, {self.tt.misses} misses "
+                f"({rate:.1%} hit rate)\n"
+            )
+
+        out.write("time per query:\n")
+        for (current, left, right), secs in self.times:
+            out.write(f"    {current} {left} {right}: {secs:.6f}s\n")
+
+    def dump_heatmap(self, out: TextIO):
+        """Writes calls per position as CSV, one row per left value"""
+        if not self.cost:
+            return
+
+        max_left = max(left for left, _ in self.cost)
+        max_right = max(right for _, right in self.cost)
+        out.write("left\\right," + ",".join(map(str, range(max_right + 1))) + "\n")
+        for left in range(max_left + 1):
+            row = (str(self.cost[(left, right)]) for right in range(max_right + 1))
+            out.write(f"{left}," + ",".join(row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--solver", choices=tuple(SOLVERS), default="tp01")
+    parser.add_argument(
+        "--tt", action="store_true", help="search with a transposition table"
+    )
+    parser.add_argument(
+        "--heatmap", metavar="FILE", help="write calls per position to FILE as CSV"
+    )
+    opts = parser.parse_args()
+
+    profiler = Profiler(SOLVERS[opts.solver], TranspositionTable() if opts.tt else None)
+
+    tokens = (token for line in sys.stdin for token in line.split())
+    for player, left, right in zip(tokens, tokens, tokens):
+        print(profiler.winner(player, int(left), int(right)))  # type: ignore
+
+    profiler.report(sys.stderr)
+    if opts.heatmap is not None:
+        with open(opts.heatmap, "w") as f:
+            profiler.dump_heatmap(f)
+
+
+if __name__ == "__main__":
+    main()
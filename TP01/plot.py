@@ -1,26 +1,91 @@
-import math
+import argparse
+import sys
+from typing import Iterator, List, TextIO
 
-import matplotlib.pyplot as plt
+import numpy as np
 
-fname = "output-2.txt"
+# Number of bytes of lines parsed at once
+CHUNK_SIZE = 1 << 20
 
-nums: list[int] = []
-with open(fname, "r") as f:
-    for line in f:
-        data = int(line.split()[-1])
-        nums.append(data)
+# Every bucket is "<= 5^p", the smallest one is 5^2
+MIN_POWER = 2
 
-maxnum = max(nums)
-maxpow = math.ceil(math.log(maxnum, 5))
+# 5^27 is the biggest power of 5 that fits in int64
+POWERS = 5 ** np.arange(28, dtype=np.int64)
 
-arr = [0] * (maxpow - 1)
-for num in nums:
-    power = math.ceil(math.log(num, 5))
-    arr[power - 2] += 1
 
-x = []
-for i in range(maxpow - 1):
-    x.append(f"<= 5^{i+2}")
+def read_counts(f: TextIO) -> Iterator[np.ndarray]:
+    """Yields recursion counts (last column of each line) in chunks"""
+    while True:
+        lines = f.readlines(CHUNK_SIZE)
+        if not lines:
+            return
 
-plt.bar(x, arr)
-plt.show()
+        yield np.fromiter(
+            (line.rsplit(None, 1)[-1] for line in lines if line.strip()),
+            dtype=np.int64,
+        )
+
+
+def histogram(f: TextIO) -> List[int]:
+    """Counts how many values fall in each "<= 5^p" bucket
+
+    Index i of the result is the bucket for 5^(i + MIN_POWER). Only the bucket
+    counters are kept, so the file can be as big as needed."""
+    counts = np.zeros(0, dtype=np.int64)
+
+    for nums in read_counts(f):
+        if len(nums) == 0:
+            continue
+
+        # Smallest p such that num <= 5^p, which is ceil(log5(num)) without
+        # the rounding errors of log on exact powers
+        buckets = np.searchsorted(POWERS, nums, side="left") - MIN_POWER
+        buckets = np.maximum(buckets, 0)
+
+        chunk_counts = np.bincount(buckets)
+        if len(chunk_counts) > len(counts):
+            chunk_counts[: len(counts)] += counts
+            counts = chunk_counts
+        else:
+            counts[: len(chunk_counts)] += chunk_counts
+
+    return counts.tolist()
+
+
+def labels(counts: List[int]) -> List[str]:
+    """Bar labels of the histogram buckets"""
+    return [f"<= 5^{i + MIN_POWER}" for i in range(len(counts))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fname", nargs="?", default="output-2.txt")
+    parser.add_argument(
+        "--csv",
+        metavar="FILE",
+        help="write the histogram to FILE (- for stdout) instead of plotting",
+    )
+    opts = parser.parse_args()
+
+    with open(opts.fname, "r") as f:
+        counts = histogram(f)
+
+    if opts.csv is not None:
+        out = sys.stdout if opts.csv == "-" else open(opts.csv, "w")
+        out.write("bucket,count\n")
+        for label, count in zip(labels(counts), counts):
+            out.write(f"{label},{count}\n")
+        if out is not sys.stdout:
+            out.close()
+        return
+
+    # Only needed to show the plot, so headless runs work without it
+    import matplotlib.pyplot as plt
+
+    plt.bar(labels(counts), counts)
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,23 @@
 import subprocess
 
-RUN_CMD = "python tp01.py"
+# All queries are answered by a single process, see `--batch` in tp01.py
+RUN_CMD = "python tp01.py --batch"
 
-f = open("output.txt", "w")
-c = 1
+queries: list[str] = []
 for i in range(2, 11):
     for j in range(2, 11):
         for k in ("Tara", "Kenneth"):
-            inp = f"{k}\n{i} {j}"
-            print("Attempting:", inp)
+            queries.append(f"{k}\n{i} {j}")
 
-            p = subprocess.Popen(
-                RUN_CMD.split(),
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-            )
-            out, _ = p.communicate(inp.encode(), 5)
-            f.write(f"input{c}: {out.decode()}")
+print("Attempting", len(queries), "queries")
+p = subprocess.Popen(
+    RUN_CMD.split(),
+    stdin=subprocess.PIPE,
+    stdout=subprocess.PIPE,
+)
+out, _ = p.communicate("\n".join(queries).encode(), 5)
 
-            c += 1
+f = open("output.txt", "w")
+for c, winner in enumerate(out.decode().splitlines(), 1):
+    f.write(f"input{c}: {winner}\n")
 f.close()
@@ -1,9 +1,17 @@
-from typing import Literal
+import sys
+from typing import Literal, Optional
+
+from tp01 import TranspositionTable
 
 c = 0
 
 
-def game(current: Literal["Kenneth", "Tara"], left: int, right: int):
+def game(
+    current: Literal["Kenneth", "Tara"],
+    left: int,
+    right: int,
+    tt: Optional[TranspositionTable] = None,
+):
     global c
     c += 1
     # Define next player, that is the opposite of our current player
@@ -16,6 +24,12 @@ def game(current: Literal["Kenneth", "Tara"], left: int, right: int):
     if right == 0 and left == 0:
         return next_player
 
+    # Reuse the answer if this position (or its mirror) was solved before
+    if tt is not None:
+        known = tt.get(current, left, right)
+        if known is not None:
+            return known
+
     # The idea here is to basically try all options and see if we could win,
     # if we cannot win with that move, we backtrack and choose another move.
     #
@@ -25,24 +39,33 @@ def game(current: Literal["Kenneth", "Tara"], left: int, right: int):
     #
     # However, if the box does not contain enough beads, we skip the move.
     if (
-        (right >= 1 and game(next_player, left, right - 1) == current)
-        or (left >= 1 and game(next_player, left - 1, right) == current)
+        (right >= 1 and game(next_player, left, right - 1, tt) == current)
+        or (left >= 1 and game(next_player, left - 1, right, tt) == current)
         or (
             right >= 1
             and left >= 1
-            and game(next_player, left - 1, right - 1) == current
+            and game(next_player, left - 1, right - 1, tt) == current
         )
-        or (right >= 2 and game(next_player, left, right - 2) == current)
-        or (left >= 2 and game(next_player, left - 2, right) == current)
+        or (right >= 2 and game(next_player, left, right - 2, tt) == current)
+        or (left >= 2 and game(next_player, left - 2, right, tt) == current)
     ):
-        return current
+        winner = current
+    else:
+        # By this point all possible move loses us, we simply set
+        # the other player as the winner.
+        winner = next_player
 
-    # By this point all possible move loses us, we simply set
-    # the other player as the winner.
-    return next_player
+    if tt is not None:
+        tt.put(current, left, right, winner)
+    return winner
 
 
 if __name__ == "__main__":
+    # Pass --tt to search with a transposition table, its stats go to stderr
+    tt = TranspositionTable() if "--tt" in sys.argv[1:] else None
+
     first: Literal["Kenneth", "Tara"] = input()  # type: ignore
     left, right = map(int, input().split())
-    print(game(first, left, right), c)
+    print(game(first, left, right, tt), c)
+    if tt is not None:
+        print(tt, file=sys.stderr)
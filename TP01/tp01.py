@@ -1,19 +1,112 @@
 # To run, it requires at least Python 3.8 (Literal typing)
 # Simply run this file and insert the inputs
-from typing import Literal
+#
+# Pass `--solver table` to answer from the bottom-up outcome table instead
+# of the recursive search, which handles boxes in the thousands. Pass
+# `--solver iterative` for the same search as `game` without recursion.
+#
+# Pass `--batch [FILE]` to answer any number of queries (player, then left and
+# right, in the same layout as the normal input) from FILE or stdin, one
+# winner per line, all from a single shared outcome table.
+#
+# Pass `--cache FILE` to make the table solver and `--batch` answer from an
+# outcome table saved in FILE (see cache.py), which is built on first use.
+import argparse
+import sys
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
 
+if TYPE_CHECKING:
+    from cache import OutcomeCache
 
-def game(current: Literal["Kenneth", "Tara"], left: int, right: int):
+Player = Literal["Kenneth", "Tara"]
+
+
+class TranspositionTable:
+    """Cache of already solved positions for the recursive search.
+
+    Every move works the same way on both boxes, so (left, right) and
+    (right, left) always have the same winner. Positions are stored under
+    (player, min, max) so both orders share one entry.
+
+    If maxsize is given, the least recently used entry is evicted once the
+    table grows past it."""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], Player]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (
+            f"TranspositionTable(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    @staticmethod
+    def key(current: Player, left: int, right: int) -> Tuple[str, int, int]:
+        """Canonical key of a position"""
+        if left > right:
+            left, right = right, left
+        return (current, left, right)
+
+    def get(self, current: Player, left: int, right: int) -> Optional[Player]:
+        """Returns the stored winner of the position, or None"""
+        key = self.key(current, left, right)
+        winner = self._entries.get(key)
+        if winner is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.maxsize is not None:
+            self._entries.move_to_end(key)
+        return winner
+
+    def put(self, current: Player, left: int, right: int, winner: Player):
+        """Stores the winner of the position"""
+        key = self.key(current, left, right)
+        self._entries[key] = winner
+        if self.maxsize is not None:
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def game(
+    current: Player,
+    left: int,
+    right: int,
+    tt: Optional[TranspositionTable] = None,
+):
     # Define next player, that is the opposite of our current player
     # Previous player is also the next player
-    next_player: Literal["Kenneth", "Tara"] = (
-        "Tara" if current == "Kenneth" else "Kenneth"
-    )
+    next_player: Player = "Tara" if current == "Kenneth" else "Kenneth"
 
     # The boxes are empty now, then previous player took the last turn and won
     if right == 0 and left == 0:
         return next_player
 
+    # Reuse the answer if this position (or its mirror) was solved before
+    if tt is not None:
+        known = tt.get(current, left, right)
+        if known is not None:
+            return known
+
     # The idea here is to try the options one by one and see if we could win,
     # if we cannot win with that move, we backtrack and choose another move
     #
@@ -28,29 +121,272 @@ def game(current: Literal["Kenneth", "Tara"], left: int, right: int):
     # time and reduced recursive call when the bigger deltas can already
     # be proven to win current player
     if (
-        (right >= 2 and game(next_player, left, right - 2) == current)
-        or (left >= 2 and game(next_player, left - 2, right) == current)
+        (right >= 2 and game(next_player, left, right - 2, tt) == current)
+        or (left >= 2 and game(next_player, left - 2, right, tt) == current)
         or (
             right >= 1
             and left >= 1
-            and game(next_player, left - 1, right - 1) == current
+            and game(next_player, left - 1, right - 1, tt) == current
         )
-        or (right >= 1 and game(next_player, left, right - 1) == current)
-        or (left >= 1 and game(next_player, left - 1, right) == current)
+        or (right >= 1 and game(next_player, left, right - 1, tt) == current)
+        or (left >= 1 and game(next_player, left - 1, right, tt) == current)
     ):
         # If we get here, then any of possible move can make us win so
-        # return current player
-        return current
+        # current player is the winner
+        winner = current
+    else:
+        # By this point all possible move loses us, we simply set
+        # the other player as the winner.
+        winner = next_player
 
-    # By this point all possible move loses us, we simply set
-    # the other player as the winner.
-    return next_player
+    if tt is not None:
+        tt.put(current, left, right, winner)
+    return winner
 
 
-if __name__ == "__main__":
+# Moves as (taken from left, taken from right), in the same order `game` tries
+MOVES = ((0, 2), (2, 0), (1, 1), (0, 1), (1, 0))
+
+
+class IterativeSolver:
+    """Memoized search over an explicit stack instead of recursion.
+
+    This walks the positions in exactly the same order as `game`, including
+    stopping at the first winning move, but each pending position is a small
+    list on a stack instead of a Python frame. That means there is no
+    recursion limit on the box sizes and no call overhead.
+
+    Results are memoized per (min, max) position, as the player to move
+    does not change who wins, only their name. `calls` counts positions the
+    same way `game` counts calls: the root and every child tried, including
+    the ones already solved and the empty boxes."""
+
+    def __init__(self):
+        self.calls = 0
+        # True when the player to move wins, empty boxes lose
+        self._memo = {(0, 0): False}
+
+    def is_winning(self, left: int, right: int) -> bool:
+        """Check if the player to move at (left, right) wins"""
+        memo = self._memo
+        root = (left, right) if left <= right else (right, left)
+        self.calls += 1
+        if root in memo:
+            return memo[root]
+
+        # Each frame is [left, right, index of the move being tried]
+        stack = [[left, right, 0]]
+
+        # Value of the frame that was just popped, None if we are not
+        # coming back from a child
+        result: Optional[bool] = None
+        while stack:
+            frame = stack[-1]
+            left, right, move = frame
+
+            if result is not None:
+                # The child from `move` loses for its player, so we win
+                if not result:
+                    result = True
+                    stack.pop()
+                    memo[(left, right) if left <= right else (right, left)] = True
+                    continue
+
+                # Otherwise carry on with the next move
+                move += 1
+                result = None
+
+            pushed = False
+            winning = False
+            while move < len(MOVES):
+                take_left, take_right = MOVES[move]
+                if left < take_left or right < take_right:
+                    move += 1
+                    continue
+
+                next_left, next_right = left - take_left, right - take_right
+                self.calls += 1
+                key = (
+                    (next_left, next_right)
+                    if next_left <= next_right
+                    else (next_right, next_left)
+                )
+                known = memo.get(key)
+                if known is None:
+                    # Not solved yet, solve the child first then come back
+                    frame[2] = move
+                    stack.append([next_left, next_right, 0])
+                    pushed = True
+                    break
+
+                if not known:
+                    winning = True
+                    break
+                move += 1
+
+            if pushed:
+                continue
+
+            # Either a winning move was found or every move was exhausted
+            stack.pop()
+            memo[(left, right) if left <= right else (right, left)] = winning
+            result = winning
+
+        return memo[root]
+
+    def winner(self, current: Player, left: int, right: int) -> Player:
+        """Same as `game`, answered by the iterative search"""
+        if self.is_winning(left, right):
+            return current
+        return "Tara" if current == "Kenneth" else "Kenneth"
+
+
+class OutcomeTable:
+    """Bottom-up win/lose table over every (left, right) position.
+
+    Every move takes either one or two beads in total, so a position with
+    `n` beads only depends on positions with `n - 1` and `n - 2` beads. The
+    table is therefore built one diagonal (positions with the same total)
+    at a time, where each diagonal is a bitmask indexed by `left`. Bit `l`
+    of diagonal `n` is set when (l, n - l) loses for the player to move.
+
+    The whole diagonal is derived from the previous two with a handful of
+    shifts, so building the table for boxes in the thousands is instant and
+    a query is a single shift and mask."""
+
+    def __init__(self, max_left: int = 0, max_right: int = 0):
+        self._losing: List[int] = []
+        self._extend(max_left + max_right)
+
+    def _extend(self, total: int):
+        """Builds the diagonals up to `total` beads in total"""
+        losing = self._losing
+        for n in range(len(losing), total + 1):
+            # Mask of every valid left value for this diagonal
+            full = (1 << (n + 1)) - 1
+
+            # A position wins if any move lands on a losing position:
+            # taking 1 from right keeps `left`, taking 1 from left shifts it
+            winning = 0
+            if n >= 1:
+                prev = losing[n - 1]
+                winning |= prev | prev << 1
+
+            # Same for 2 beads: from right, one from each, and from left
+            if n >= 2:
+                prev2 = losing[n - 2]
+                winning |= prev2 | prev2 << 1 | prev2 << 2
+
+            losing.append(~winning & full)
+
+    def diagonal(self, total: int) -> int:
+        """Bitmask of the losing positions with total beads, by left"""
+        if total >= len(self._losing):
+            self._extend(total)
+        return self._losing[total]
+
+    def is_winning(self, left: int, right: int) -> bool:
+        """Check if the player to move at (left, right) wins"""
+        return not (self.diagonal(left + right) >> left) & 1
+
+    def winner(self, current: Player, left: int, right: int) -> Player:
+        """Same as `game`, answered from the table"""
+        if self.is_winning(left, right):
+            return current
+        return "Tara" if current == "Kenneth" else "Kenneth"
+
+
+def solve_batch(
+    lines: Iterable[str], table: Union[OutcomeTable, "OutcomeCache"]
+) -> Iterator[Player]:
+    """Yields the winner of every (player, left, right) query in lines
+
+    Queries are read as a stream of whitespace separated tokens, so both the
+    usual two line layout and one query per line work. An incomplete query at
+    the end of the input is ignored."""
+    tokens = (token for line in lines for token in line.split())
+    for player, left, right in zip(tokens, tokens, tokens):
+        yield table.winner(player, int(left), int(right))  # type: ignore
+
+
+def run_batch(
+    fname: str,
+    out: TextIO = sys.stdout,
+    table: Union[OutcomeTable, "OutcomeCache", None] = None,
+):
+    """Answers every query from fname (or stdin for "-") into out"""
+    if table is None:
+        table = OutcomeTable()
+
+    if fname == "-":
+        for winner in solve_batch(sys.stdin, table):
+            out.write(winner + "\n")
+        return
+
+    with open(fname, "r") as f:
+        for winner in solve_batch(f, table):
+            out.write(winner + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--solver",
+        choices=("recursive", "iterative", "table"),
+        default="recursive",
+        help="algorithm used to find the winner",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="answer every query in FILE (default: stdin) using the table",
+    )
+    parser.add_argument(
+        "--tt",
+        nargs="?",
+        type=int,
+        const=0,
+        metavar="SIZE",
+        help="cache positions in the recursive search, LRU bounded if SIZE > 0",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        help="answer the table solver and --batch from the table saved in FILE",
+    )
+    opts = parser.parse_args()
+
+    table: Union[OutcomeTable, "OutcomeCache", None] = None
+    if opts.cache is not None:
+        from cache import OutcomeCache
+
+        table = OutcomeCache(opts.cache)
+
+    if opts.batch is not None:
+        run_batch(opts.batch, table=table)
+        return
+
     # Input first player
-    first: Literal["Kenneth", "Tara"] = input()  # type: ignore
+    first: Player = input()  # type: ignore
 
     # Input left and right boxes
     left, right = map(int, input().split())
-    print(game(first, left, right))
+
+    if opts.solver == "table":
+        if table is None:
+            table = OutcomeTable(left, right)
+        print(table.winner(first, left, right))
+    elif opts.solver == "iterative":
+        print(IterativeSolver().winner(first, left, right))
+    elif opts.tt is not None:
+        tt = TranspositionTable(opts.tt or None)
+        print(game(first, left, right, tt))
+        print(tt, file=sys.stderr)
+    else:
+        print(game(first, left, right))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Headless batch evaluator, no tkinter needed.
+
+Reads one infix expression per line and writes, in input order, the postfix
+form, value and errors of each one, same as the GUI shows them. Lines are
+sent in chunks to a pool of worker processes.
+
+Run with `python batch.py [FILE] [-o OUT] [--format tsv|jsonl] [-j JOBS]
+[--max-bits BITS] [--mod N] [--numpy | --dag | --stream]`, FILE and OUT
+default to stdin and stdout. Intermediate results are limited to
+DEFAULT_MAX_BITS bits, same as in the GUI, `--max-bits 0` lifts the limit.
+With --numpy, the expressions of a chunk are evaluated together by
+`vectorized.evaluate_many`. With --dag, every worker evaluates through one
+`dag.ExpressionDAG`, so repeated subexpressions are computed once. With
+--stream, expressions go through `evaluate_stream` and the postfix column is
+left empty, for expressions too long to keep their postfix form."""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO
+
+from converter import DEFAULT_MAX_BITS, compile_expr, convert, evaluate_stream
+
+if TYPE_CHECKING:
+    from dag import ExpressionDAG
+
+# Number of lines sent to a worker at once
+CHUNK_SIZE = 1000
+
+# (infix, postfix, value, errors) of one expression
+Result = tuple[str, str, str, str]
+
+# DAG of the current process, kept across chunks
+_dag: Optional["ExpressionDAG"] = None
+
+
+def allow_big_ints():
+    """Lifts the limit on printing huge ints (Python 3.11+), results here are
+    written to files, not shown in a label"""
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+
+def get_dag() -> "ExpressionDAG":
+    """The DAG shared by every chunk processed in this process"""
+    global _dag
+    if _dag is None:
+        from dag import ExpressionDAG
+
+        _dag = ExpressionDAG()
+    return _dag
+
+
+def process_expr(
+    expr: str,
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+    evaluator=None,
+) -> Result:
+    """Converts and evaluates expr, same as `MainWindow.on_change`
+
+    Expressions go through `compile_expr`, so a repeated line is neither
+    converted nor parsed again, and is run as its compiled `Program` unless
+    another evaluator is given."""
+    errors: list[str] = []
+
+    program, err = compile_expr(expr)
+    expr_cmds = program.cmds
+    if err:
+        errors.append(err)
+
+    expr_val = ""
+    if expr_cmds:
+        if evaluator is None:
+            value, err = program.run(max_bits, modulus)
+        else:
+            value, err = evaluator(expr_cmds, max_bits, modulus)
+        expr_val = str(value)
+        if err:
+            errors.append(err)
+
+    return expr, " ".join(expr_cmds), expr_val, ", ".join(errors)
+
+
+def process_expr_stream(
+    expr: str, max_bits: Optional[int] = None, modulus: Optional[int] = None
+) -> Result:
+    """Same as `process_expr`, without the postfix form"""
+    value, errors = evaluate_stream(expr, max_bits, modulus)
+    expr_val = "" if value is None else str(value)
+    return expr, "", expr_val, ", ".join(errors)
+
+
+def process_chunk_numpy(
+    lines: list[str], max_bits: Optional[int], modulus: Optional[int]
+) -> list[Result]:
+    """Same as `process_chunk`, evaluating the whole chunk at once"""
+    from vectorized import evaluate_many
+
+    converted = [convert(line) for line in lines]
+    values = iter(
+        evaluate_many([cmds for cmds, _ in converted if cmds], max_bits, modulus)
+    )
+
+    results: list[Result] = []
+    for line, (expr_cmds, err) in zip(lines, converted):
+        errors = [err] if err else []
+        expr_val = ""
+        if expr_cmds:
+            value, err = next(values)
+            expr_val = str(value)
+            if err:
+                errors.append(err)
+
+        results.append((line, " ".join(expr_cmds), expr_val, ", ".join(errors)))
+    return results
+
+
+def process_chunk(
+    lines: list[str],
+    max_bits: Optional[int],
+    modulus: Optional[int],
+    engine: str = "scalar",
+) -> list[Result]:
+    """Processes every line of a chunk, in a worker process"""
+    if engine == "numpy":
+        return process_chunk_numpy(lines, max_bits, modulus)
+    if engine == "stream":
+        return [process_expr_stream(line, max_bits, modulus) for line in lines]
+
+    evaluator = get_dag().evaluate if engine == "dag" else None
+    return [process_expr(line, max_bits, modulus, evaluator) for line in lines]
+
+
+def read_chunks(lines: Iterable[str]) -> Iterator[list[str]]:
+    """Yields lists of CHUNK_SIZE expressions, without the newlines"""
+    it = (line.rstrip("\r\n") for line in lines)
+    while True:
+        chunk = list(islice(it, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(
+    lines: Iterable[str],
+    jobs: Optional[int] = None,
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+    engine: str = "scalar",
+) -> Iterator[Result]:
+    """Yields the result of every line, in input order"""
+    allow_big_ints()
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for chunk in read_chunks(lines):
+            yield from process_chunk(chunk, max_bits, modulus, engine)
+        return
+
+    with ProcessPoolExecutor(jobs, initializer=allow_big_ints) as pool:
+        # Keep a bounded number of chunks in flight, so memory does not grow
+        # with the input while results are written in order
+        pending: deque = deque()
+        for chunk in read_chunks(lines):
+            pending.append(pool.submit(process_chunk, chunk, max_bits, modulus, engine))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+
+        for future in pending:
+            yield from future.result()
+
+
+def write_results(results: Iterable[Result], out: TextIO, fmt: str):
+    """Writes results as TSV or JSON lines"""
+    if fmt == "tsv":
+        out.write("infix\tpostfix\tvalue\terrors\n")
+        for infix, postfix, value, errors in results:
+            # Tabs are the only character that can not be written as is
+            infix = infix.replace("\t", "\\t")
+            out.write(f"{infix}\t{postfix}\t{value}\t{errors}\n")
+        return
+
+    for infix, postfix, value, errors in results:
+        out.write(
+            json.dumps(
+                {"infix": infix, "postfix": postfix, "value": value, "errors": errors}
+            )
+            + "\n"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fname", nargs="?", default="-")
+    parser.add_argument("-o", "--output", default="-")
+    parser.add_argument("--format", choices=("tsv", "jsonl"), default="tsv")
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--max-bits",
+        type=int,
+        default=DEFAULT_MAX_BITS,
+        help=f"see `evaluate`, 0 for no limit (default: {DEFAULT_MAX_BITS})",
+    )
+    parser.add_argument("--mod", type=int, help="see `evaluate`")
+    engines = parser.add_mutually_exclusive_group()
+    engines.add_argument(
+        "--numpy",
+        dest="engine",
+        action="store_const",
+        const="numpy",
+        help="evaluate chunks with NumPy",
+    )
+    engines.add_argument(
+        "--dag",
+        dest="engine",
+        action="store_const",
+        const="dag",
+        help="share repeated subexpressions across expressions",
+    )
+    engines.add_argument(
+        "--stream",
+        dest="engine",
+        action="store_const",
+        const="stream",
+        help="do not keep (nor write) the postfix form",
+    )
+    parser.set_defaults(engine="scalar")
+    opts = parser.parse_args()
+    if opts.mod is not None and opts.mod < 1:
+        parser.error("--mod must be positive")
+    if opts.max_bits < 0:
+        parser.error("--max-bits must not be negative")
+    max_bits = opts.max_bits or None
+
+    inp = sys.stdin if opts.fname == "-" else open(opts.fname, "r")
+    out = sys.stdout if opts.output == "-" else open(opts.output, "w")
+    try:
+        results = run(inp, opts.jobs, max_bits, opts.mod, opts.engine)
+        write_results(results, out, opts.format)
+    finally:
+        if inp is not sys.stdin:
+            inp.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
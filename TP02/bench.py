@@ -0,0 +1,134 @@
+"""Benchmarks for the tokenizer, the converter and the evaluator.
+
+Every stage is run on every input at growing sizes, and reports its
+throughput (chars/s and tokens/s of the input), peak memory (from
+tracemalloc, in a separate run) and scaling exponent: the slope of
+log(time) over log(size), about 1 for linear code and 2 for quadratic code.
+
+Run with `python bench.py [length] [--stage NAME] [--input NAME]`, length
+is the largest size and defaults to 100k characters."""
+
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from converter import convert, evaluate
+from tokenizer import MathTokenizer
+
+# Expression generators, each takes a length and returns an expression
+# of about that many characters
+INPUTS: dict[str, Callable[[int], str]] = {
+    "long number": lambda n: "9" * n,
+    "many small numbers": lambda n: "+".join(["12"] * (n // 3)),
+    "spaced numbers": lambda n: " + ".join(["1 2 3"] * (n // 8)),
+    "nested parentheses": lambda n: "(1+" * (n // 4) + "1" + ")" * (n // 4),
+    "power chain": lambda n: "$".join(["1"] * (n // 2)),
+    "whitespace": lambda n: "  +  ".join([" 1   "] * (n // 10)),
+}
+
+# Number of sizes, each half the next one
+STEPS = 4
+
+# Runs per measure (at least REPEAT, and at least MIN_SECS in total), the
+# fastest one is kept
+REPEAT = 3
+MIN_SECS = 0.1
+
+# Exponents above this are flagged, small sizes are too noisy to flag less
+SUPERLINEAR = 1.5
+
+
+def allow_big_ints():
+    """Lifts the limit on parsing huge ints (Python 3.11+), for long numbers"""
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+
+def count_tokens(expr: str) -> int:
+    """Number of tokens of expr"""
+    return sum(1 for _ in MathTokenizer(expr))
+
+
+# Stages as (prepare, run): prepare turns an expression into the input of
+# run, outside of the timed part
+STAGES: dict[str, tuple[Callable[[str], Any], Callable[[Any], Any]]] = {
+    "tokenizer": (lambda expr: expr, count_tokens),
+    "convert": (lambda expr: expr, convert),
+    "evaluate": (lambda expr: convert(expr)[0], evaluate),
+}
+
+
+def measure(run: Callable[[Any], Any], arg: Any) -> tuple[float, int]:
+    """Returns (best seconds, peak bytes allocated) of run(arg)"""
+    best = math.inf
+    runs, total = 0, 0.0
+    while runs < REPEAT or total < MIN_SECS:
+        start = time.perf_counter()
+        run(arg)
+        secs = time.perf_counter() - start
+        best = min(best, secs)
+        runs, total = runs + 1, total + secs
+
+    tracemalloc.start()
+    try:
+        run(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def scaling_exponent(sizes: list[int], secs: list[float]) -> float:
+    """Least squares slope of log(secs) over log(sizes)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(sec, 1e-9)) for sec in secs]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    return num / den if den else 0.0
+
+
+def bench(stage: str, name: str, length: int):
+    """Runs one stage on one input at every size and prints the results"""
+    prepare, run = STAGES[stage]
+    print(f"{stage} / {name}:")
+
+    sizes: list[int] = []
+    times: list[float] = []
+    for step in reversed(range(STEPS)):
+        expr = INPUTS[name](length >> step)
+        tokens = count_tokens(expr)
+        secs, peak = measure(run, prepare(expr))
+
+        sizes.append(len(expr))
+        times.append(secs)
+        print(
+            f"    {len(expr):>10} chars: {secs:.4f}s, "
+            f"{len(expr) / secs:>14,.0f} chars/s, "
+            f"{tokens / secs:>14,.0f} tokens/s, peak {peak / 1024:,.0f} KiB"
+        )
+
+    exponent = scaling_exponent(sizes, times)
+    flag = "  <- superlinear" if exponent > SUPERLINEAR else ""
+    print(f"    scaling exponent: {exponent:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("length", nargs="?", type=int, default=100_000)
+    parser.add_argument("--stage", choices=tuple(STAGES), action="append")
+    parser.add_argument("--input", choices=tuple(INPUTS), action="append")
+    opts = parser.parse_args()
+
+    allow_big_ints()
+    for stage in opts.stage or STAGES:
+        for name in opts.input or INPUTS:
+            bench(stage, name, opts.length)
+
+
+if __name__ == "__main__":
+    main()
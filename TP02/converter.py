@@ -1,12 +1,70 @@
-from typing import Optional
+import math
+import operator
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional, Union
 
 from tokenizer import MathTokenizer
 
 PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "$": 3, "(": 4, ")": 4}
 
+# Same operations as eval_math, as functions that can be called directly
+OPERATIONS: dict[str, Callable[[int, int], int]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+    "$": operator.pow,
+}
+
+# Opcodes of a compiled Program
+OP_PUSH = 0
+OP_APPLY = 1
+
+# Values in mod N mode, as (exact value if known, value mod N)
+ModValue = tuple[Optional[int], int]
+
+# Default limit on the size of any intermediate result, in bits, used by
+# the GUI and batch.py
+DEFAULT_MAX_BITS = 1_000_000
+
+# Exact values are tracked up to this many bits in mod N mode, unless a
+# max_bits is given
+MOD_EXACT_BITS = 4096
+
+
+def result_bits(left: int, right: int, op: str) -> int:
+    """Estimates the bit length of `eval_math(left, right, op)` without
+    computing it."""
+    if not isinstance(left, int) or not isinstance(right, int):
+        # Negative powers give floats, which can not grow unbounded
+        return 0
+
+    left_bits = left.bit_length()
+    if op in ("+", "-"):
+        return max(left_bits, right.bit_length()) + 1
+    elif op == "*":
+        return left_bits + right.bit_length()
+    elif op == "/":
+        return left_bits
+
+    # Powers: |left| ** right has floor(right * log2(|left|)) + 1 bits
+    if right <= 0 or abs(left) <= 1:
+        return 1
+    if right.bit_length() > 64:
+        # Too large for a float, the result has at least right + 1 bits
+        return right + 1
+    return math.floor(right * math.log2(abs(left))) + 1
+
+
+def eval_math(left: int, right: int, op: str, max_bits: Optional[int] = None) -> int:
+    """A wrapper to do math from given args.
+
+    If max_bits is given, OverflowError is raised instead of computing a
+    result estimated to need more bits than that."""
+    if max_bits is not None and result_bits(left, right, op) > max_bits:
+        raise OverflowError("Result too large")
 
-def eval_math(left: int, right: int, op: str) -> int:
-    """A wrapper to do math from given args."""
     if op == "+":
         return left + right
     elif op == "-":
@@ -19,81 +77,173 @@ def eval_math(left: int, right: int, op: str) -> int:
         return left**right
 
 
+def mod_value(value: int, modulus: int, max_bits: Optional[int] = None) -> ModValue:
+    """Number as a value of the mod N mode, see `eval_mod`"""
+    limit = MOD_EXACT_BITS if max_bits is None else max_bits
+    exact = value if value.bit_length() <= limit else None
+    return exact, value % modulus
+
+
+def eval_mod(
+    left: ModValue,
+    right: ModValue,
+    op: str,
+    modulus: int,
+    max_bits: Optional[int] = None,
+) -> ModValue:
+    """Same as eval_math, but modulo modulus.
+
+    Values are (exact value, value mod N) pairs. The exact value is kept
+    while it fits in max_bits (MOD_EXACT_BITS by default) because exponents
+    and division need it, everything else only uses the reduced value. Powers
+    use fast modular exponentiation, so they stay cheap for any exponent that
+    is known exactly. OverflowError is raised if an exponent or a division
+    operand is too large to be known exactly."""
+    left_exact, left_mod = left
+    right_exact, right_mod = right
+
+    if op == "$":
+        if right_exact is None:
+            raise OverflowError("Result too large")
+        try:
+            # Negative exponents use the modular inverse
+            residue = pow(left_mod, right_exact, modulus)
+        except ValueError:
+            raise ZeroDivisionError("Not invertible")
+    elif op == "/":
+        if left_exact is None or right_exact is None:
+            raise OverflowError("Result too large")
+        residue = eval_math(left_exact, right_exact, op) % modulus
+    else:
+        residue = eval_math(left_mod, right_mod, op) % modulus
+
+    # Carry the exact value along as long as it stays small enough
+    exact: Optional[int] = None
+    if left_exact is not None and right_exact is not None:
+        limit = MOD_EXACT_BITS if max_bits is None else max_bits
+        try:
+            if result_bits(left_exact, right_exact, op) <= limit:
+                result = eval_math(left_exact, right_exact, op)
+                if isinstance(result, int):
+                    exact = result
+        except OverflowError:
+            # Not needed for the residue, only stop tracking the exact value
+            pass
+
+    return exact, residue
+
+
+class PostfixStream:
+    """Converts infix to postfix, one command at a time
+
+    This is an iterable class, iterating over it yields the postfix commands
+    as soon as they are known, so only the operator stack is kept in
+    memory. Once the iteration stops, error holds the error that stopped it,
+    if any, same as the one returned by `convert`."""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.error: Optional[str] = None
+
+    def __iter__(self) -> Iterator[str]:
+        self.error = None
+        op_stack: list[str] = []
+
+        # Iterate through all token
+        tokenizer = MathTokenizer(self.expr)
+        for token, t_type in tokenizer:
+            # Stop with whatever that has been processed
+            if t_type == "invalid":
+                self.error = "Invalid character"
+                return
+
+            # Simply output it if its a number
+            if t_type == "num":
+                yield token
+                continue
+
+            # Open bracket only needs to be appended to stack
+            if token == "(":
+                op_stack.append(token)
+
+            elif token == ")":
+                # Check if stack is empty or not
+                if len(op_stack) == 0:
+                    self.error = "Missing opening parenthesis"
+                    return
+
+                # Output all operators until we see an open paranthesis
+                last_op = op_stack.pop()
+                while last_op != "(":
+                    yield last_op
+
+                    # We are at the end of stack, but no opening, therefore
+                    # it is missing from the input.
+                    if len(op_stack) == 0:
+                        self.error = "Missing opening parenthesis"
+                        return
+                    last_op = op_stack.pop()
+
+            else:
+                # Output all operators in order of precedence
+                while len(op_stack) != 0:
+                    last_op = op_stack.pop()
+                    if (
+                        # If something takes more precendence, it'll be
+                        # output first before current operator
+                        PRECEDENCE[token] > PRECEDENCE[last_op]
+                        or last_op == "("
+                        # Not assosiative
+                        or (last_op == token and token == "$")
+                    ):
+                        op_stack.append(last_op)
+                        break
+
+                    yield last_op
+
+                # All that takes precedence has been popped, now add current
+                op_stack.append(token)
+
+        # Clear all remainding operator stack
+        while len(op_stack) != 0:
+            op = op_stack.pop()
+            # By this stage, there should never be any opening paranthesis
+            # If there is, then there is an unclosed one
+            if op == "(":
+                self.error = "Missing closing parenthesis"
+                return
+            yield op
+
+
 def convert(expr: str) -> tuple[list[str], Optional[str]]:
     """Converts infix to postfix
 
     Returns:
         A tuple of converted tokens in stack, and an optional error if happens.
     """
-    op_stack: list[str] = []
-    cmds: list[str] = []
-
-    # Iterate through all token
-    tokenizer = MathTokenizer(expr)
-    for token, t_type in tokenizer:
-        # Return error with whatever that has been processed
-        if t_type == "invalid":
-            return cmds, "Invalid character"
-
-        # Simply append to cmds if its a number
-        if t_type == "num":
-            cmds.append(token)
-            continue
+    stream = PostfixStream(expr)
+    cmds = list(stream)
+    return cmds, stream.error
 
-        # Open bracket only needs to be appended to stack
-        if token == "(":
-            op_stack.append(token)
 
-        elif token == ")":
-            # Check if stack is empty or not
-            if len(op_stack) == 0:
-                return cmds, "Missing opening parenthesis"
+def evaluate(
+    cmds: Iterable[str],
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+) -> tuple[int, Optional[str]]:
+    """Evaluates a queue of postfix commands to its result
 
-            # Append all operators until we see an open paranthesis
-            last_op = op_stack.pop()
-            while last_op != "(":
-                cmds.append(last_op)
+    Commands are only iterated once, so they can also come from a
+    `PostfixStream`.
 
-                # We are at the end of stack, but no opening, therefore
-                # it is missing from the input.
-                if len(op_stack) == 0:
-                    return cmds, "Missing opening parenthesis"
-                last_op = op_stack.pop()
+    Args:
+        max_bits: Refuse to compute any intermediate result estimated to
+            need more bits than this, with a "Result too large" error.
+        modulus: Evaluate modulo this number (mod N), see `eval_mod`.
+    """
+    if modulus is not None:
+        return evaluate_mod(cmds, modulus, max_bits)
 
-        else:
-            # Append all operators in order of precedence
-            while len(op_stack) != 0:
-                last_op = op_stack.pop()
-                if (
-                    # If something takes more precendence, it'll be
-                    # inserted first before current operator
-                    PRECEDENCE[token] > PRECEDENCE[last_op]
-                    or last_op == "("
-                    # Not assosiative
-                    or (last_op == token and token == "$")
-                ):
-                    op_stack.append(last_op)
-                    break
-
-                cmds.append(last_op)
-
-            # All that takes precedence has been popped, now add current
-            op_stack.append(token)
-
-    # Clear all remainding operator stack
-    while len(op_stack) != 0:
-        op = op_stack.pop()
-        # By this stage, there should never be any opening paranthesis
-        # If there is, then there is an unclosed one
-        if op == "(":
-            return cmds, "Missing closing parenthesis"
-        cmds.append(op)
-
-    return cmds, None
-
-
-def evaluate(cmds: list[str]) -> tuple[int, Optional[str]]:
-    """Evaluates a queue of postfix commands to its result"""
     num_stack: list[int] = []
 
     for token in cmds:
@@ -114,9 +264,11 @@ def evaluate(cmds: list[str]) -> tuple[int, Optional[str]]:
             return second, "Missing operand"
 
         try:
-            result = eval_math(first, second, token)
+            result = eval_math(first, second, token, max_bits)
         except ZeroDivisionError:
             return first, "Zero division"
+        except OverflowError:
+            return first, "Result too large"
 
         # Push the result back to stack
         num_stack.append(result)
@@ -126,3 +278,147 @@ def evaluate(cmds: list[str]) -> tuple[int, Optional[str]]:
         return num_stack.pop(), "Missing operator"
 
     return num_stack.pop(), None
+
+
+def evaluate_mod(
+    cmds: Iterable[str], modulus: int, max_bits: Optional[int] = None
+) -> tuple[int, Optional[str]]:
+    """Same as evaluate, but the result is modulo modulus"""
+    if modulus < 1:
+        raise ValueError("Modulus must be positive")
+
+    num_stack: list[ModValue] = []
+
+    for token in cmds:
+        if token.isdigit():
+            num_stack.append(mod_value(int(token), modulus, max_bits))
+            continue
+
+        # Same error handling as evaluate, with the reduced values
+        if not num_stack:
+            return 0, "Missing operand"
+        second = num_stack.pop()
+
+        if not num_stack:
+            return second[1], "Missing operand"
+        first = num_stack.pop()
+
+        try:
+            result = eval_mod(first, second, token, modulus, max_bits)
+        except ZeroDivisionError:
+            return first[1], "Zero division"
+        except OverflowError:
+            return first[1], "Result too large"
+
+        num_stack.append(result)
+
+    if len(num_stack) != 1:
+        return num_stack.pop()[1], "Missing operator"
+
+    return num_stack.pop()[1], None
+
+
+def evaluate_stream(
+    expr: str,
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+) -> tuple[Optional[int], list[str]]:
+    """Converts and evaluates expr at once, without keeping the postfix
+    commands, so memory only depends on the depth of the stacks.
+
+    Returns:
+        The value (None if there is no command to evaluate) and the errors
+        of convert and evaluate, same as calling them one after the other.
+    """
+    stream = PostfixStream(expr)
+    cmds = iter(stream)
+    first = next(cmds, None)
+
+    value: Optional[int] = None
+    eval_err: Optional[str] = None
+    if first is not None:
+        value, eval_err = evaluate(chain((first,), cmds), max_bits, modulus)
+        # Evaluation may stop early, the rest is still converted to find
+        # any error in it
+        for _ in cmds:
+            pass
+
+    errors = [err for err in (stream.error, eval_err) if err]
+    return value, errors
+
+
+class Program:
+    """Postfix commands compiled once to be evaluated many times.
+
+    Every command is turned into an (opcode, argument, command) triple up
+    front: numbers are parsed into (OP_PUSH, int) and operators are resolved
+    into (OP_APPLY, function). Running the program does no string work at
+    all, and gives the same result and error as `evaluate` on the commands.
+    The command itself is only kept for `result_bits`."""
+
+    def __init__(self, cmds: list[str]):
+        self.cmds = cmds
+        self.code: list[tuple[int, Union[int, Callable[[int, int], int]], str]] = []
+        for token in cmds:
+            if token.isdigit():
+                self.code.append((OP_PUSH, int(token), token))
+            else:
+                # eval_math falls back to power for anything unknown
+                func = OPERATIONS.get(token, operator.pow)
+                self.code.append((OP_APPLY, func, token))
+
+    def run(
+        self, max_bits: Optional[int] = None, modulus: Optional[int] = None
+    ) -> tuple[int, Optional[str]]:
+        """Same as `evaluate(self.cmds, max_bits, modulus)`
+
+        Values in mod N mode are not plain ints, so that mode uses
+        `evaluate_mod` directly."""
+        if modulus is not None:
+            return evaluate_mod(self.cmds, modulus, max_bits)
+
+        num_stack: list[int] = []
+        push = num_stack.append
+        pop = num_stack.pop
+
+        for opcode, arg, token in self.code:
+            if opcode == OP_PUSH:
+                push(arg)  # type: ignore
+                continue
+
+            # Same error handling as evaluate, in the same order
+            if not num_stack:
+                return 0, "Missing operand"
+            second = pop()
+
+            if not num_stack:
+                return second, "Missing operand"
+            first = pop()
+
+            try:
+                # Same check as eval_math
+                if max_bits is not None:
+                    if result_bits(first, second, token) > max_bits:
+                        raise OverflowError("Result too large")
+                push(arg(first, second))  # type: ignore
+            except ZeroDivisionError:
+                return first, "Zero division"
+            except OverflowError:
+                return first, "Result too large"
+
+        if len(num_stack) != 1:
+            return num_stack.pop(), "Missing operator"
+
+        return num_stack.pop(), None
+
+
+@lru_cache(maxsize=256)
+def compile_expr(expr: str) -> tuple[Program, Optional[str]]:
+    """Converts infix to a compiled postfix Program
+
+    Returns:
+        Same as convert, with the commands compiled. Results are cached per
+        expression, so compiling the same expression again is free.
+    """
+    cmds, err = convert(expr)
+    return Program(cmds), err
@@ -0,0 +1,178 @@
+"""Postfix commands as a DAG of shared subexpressions.
+
+Every subexpression is hash-consed: a number is keyed by its value and an
+operation by (operator, id of the left node, id of the right node), so
+identical subtrees are one node, within one expression and across all the
+expressions built by the same `ExpressionDAG`. Every expression here is made
+of constants only, so each node is folded to its value once, when it is
+first built, and the nodes are kept in an LRU cache.
+
+Evaluating `(123$45)*(123$45)` computes the power once, and evaluating it
+again only looks up nodes, so heavy repetition costs one big operation per
+unique subtree instead of one per occurrence."""
+
+from collections import OrderedDict
+from typing import Optional, Union
+
+from converter import eval_math, evaluate_mod, result_bits
+
+# A number, or (operator, left id, right id)
+Key = Union[int, tuple[str, int, int]]
+
+
+class Node:
+    """One unique subexpression and its value"""
+
+    __slots__ = ("id", "op", "left", "right", "value")
+
+    def __init__(
+        self,
+        id: int,
+        value: int,
+        op: Optional[str] = None,
+        left: Optional["Node"] = None,
+        right: Optional["Node"] = None,
+    ):
+        self.id = id
+        self.value = value
+        # Numbers have no operator and no children
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        if self.op is None:
+            return f"Node({self.value})"
+        return f"Node({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class ExpressionDAG:
+    """Builds and evaluates expressions, sharing nodes between all of them.
+
+    If maxsize is given, the least recently used node is evicted once the
+    cache grows past it. Nodes built on top of an evicted one are still
+    valid, they just stop being found, as a new node gets a new id."""
+
+    def __init__(self, maxsize: Optional[int] = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._nodes: "OrderedDict[Key, Node]" = OrderedDict()
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __repr__(self):
+        return (
+            f"ExpressionDAG(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def _lookup(self, key: Key) -> Optional[Node]:
+        node = self._nodes.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.maxsize is not None:
+            self._nodes.move_to_end(key)
+        return node
+
+    def _add(self, key: Key, node: Node) -> Node:
+        self._nodes[key] = node
+        if self.maxsize is not None and len(self._nodes) > self.maxsize:
+            self._nodes.popitem(last=False)
+        return node
+
+    def number(self, token: str) -> Node:
+        """Node of a number command"""
+        value = int(token)
+        node = self._lookup(value)
+        if node is None:
+            self._next_id += 1
+            node = self._add(value, Node(self._next_id, value))
+        return node
+
+    def apply(
+        self, op: str, left: Node, right: Node, max_bits: Optional[int] = None
+    ) -> Node:
+        """Node of `left op right`, raises the same errors as eval_math"""
+        key = (op, left.id, right.id)
+        node = self._lookup(key)
+        if node is not None:
+            # The value is known, but it may still be over this limit
+            if max_bits is not None:
+                if result_bits(left.value, right.value, op) > max_bits:
+                    raise OverflowError("Result too large")
+            return node
+
+        # Failed operations are not cached, they end the evaluation anyway
+        value = eval_math(left.value, right.value, op, max_bits)
+        self._next_id += 1
+        return self._add(key, Node(self._next_id, value, op, left, right))
+
+    def _build(
+        self, cmds: list[str], max_bits: Optional[int]
+    ) -> tuple[list[Node], Optional[tuple[int, str]]]:
+        """Nodes left on the stack, and the early result of `evaluate` if it
+        would have stopped with an error"""
+        stack: list[Node] = []
+
+        for token in cmds:
+            if token.isdigit():
+                stack.append(self.number(token))
+                continue
+
+            # Same error handling as evaluate, in the same order
+            if not stack:
+                return stack, (0, "Missing operand")
+            second = stack.pop()
+
+            if not stack:
+                return stack, (second.value, "Missing operand")
+            first = stack.pop()
+
+            try:
+                stack.append(self.apply(token, first, second, max_bits))
+            except ZeroDivisionError:
+                return stack, (first.value, "Zero division")
+            except OverflowError:
+                return stack, (first.value, "Result too large")
+
+        return stack, None
+
+    def build(self, cmds: list[str], max_bits: Optional[int] = None) -> Node:
+        """Root node of the expression
+
+        Raises:
+            ValueError: If evaluate would have returned an error.
+        """
+        stack, result = self._build(cmds, max_bits)
+        if result is not None:
+            raise ValueError(result[1])
+        if len(stack) != 1:
+            raise ValueError("Missing operator")
+        return stack[0]
+
+    def evaluate(
+        self,
+        cmds: list[str],
+        max_bits: Optional[int] = None,
+        modulus: Optional[int] = None,
+    ) -> tuple[int, Optional[str]]:
+        """Same as `converter.evaluate`
+
+        Values in mod N mode are cheap to compute already, so that mode is
+        not cached and uses `evaluate_mod` directly."""
+        if modulus is not None:
+            return evaluate_mod(cmds, modulus, max_bits)
+
+        stack, result = self._build(cmds, max_bits)
+        if result is not None:
+            return result
+
+        if len(stack) != 1:
+            return stack.pop().value, "Missing operator"
+        return stack.pop().value, None
@@ -0,0 +1,240 @@
+from typing import Optional
+
+from converter import PRECEDENCE, eval_math, eval_mod, mod_value
+from tokenizer import MathTokenizer
+
+# Stacks are kept as immutable linked lists of (top, rest) so that saving
+# the state after every token is O(1) instead of a copy of the whole stack.
+Stack = Optional[tuple]
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Length of the longest common prefix of a and b"""
+    low, high = 0, min(len(a), len(b))
+    # Binary search on slice comparisons, which are done in C
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class _Checkpoint:
+    """Converter state right after a token"""
+
+    __slots__ = ("offset", "cmds_len", "op_stack", "error")
+
+    def __init__(self, offset: int, cmds_len: int, op_stack: Stack, error):
+        self.offset = offset
+        self.cmds_len = cmds_len
+        self.op_stack = op_stack
+        self.error: Optional[str] = error
+
+
+class _EvalState:
+    """Evaluator state after a number of postfix commands"""
+
+    __slots__ = ("num_stack", "depth", "result")
+
+    def __init__(self, num_stack: Stack, depth: int, result):
+        self.num_stack = num_stack
+        self.depth = depth
+        # Set once evaluate would have returned early with an error
+        self.result: Optional[tuple[int, str]] = result
+
+
+class IncrementalParser:
+    """Same as `convert` and `evaluate`, but reuses the work of the previous
+    expression up to the first character that changed.
+
+    The converter state (postfix commands so far and the operator stack) is
+    saved after every token, keyed by the tokenizer offset. On a new
+    expression, parsing restarts from the last state that did not look at any
+    changed character. The evaluator state is saved after every postfix
+    command the same way, so only new commands are evaluated again."""
+
+    def __init__(self, max_bits: Optional[int] = None, modulus: Optional[int] = None):
+        self.max_bits = max_bits
+        self.modulus = modulus
+
+        self._expr = ""
+        self._cmds: list[str] = []
+        self._checkpoints: list[_Checkpoint] = [_Checkpoint(0, 0, None, None)]
+        self._eval_states: list[_EvalState] = [_EvalState(None, 0, None)]
+
+        # Number of commands in _cmds that come from checkpoints, the
+        # operators flushed by the last update are kept after them
+        self._cmds_len = 0
+
+    def set_mode(self, max_bits: Optional[int], modulus: Optional[int]):
+        """Changes the evaluation options, same as the ones of `evaluate`"""
+        if modulus is not None and modulus < 1:
+            raise ValueError("Modulus must be positive")
+
+        if (max_bits, modulus) != (self.max_bits, self.modulus):
+            self.max_bits, self.modulus = max_bits, modulus
+            # Saved values were computed with the old options
+            del self._eval_states[1:]
+
+    def _restore(self, changed: int):
+        """Drops every state that depends on characters from changed onward"""
+        # A checkpoint at offset o may depend on the character at o (the
+        # one ending an operand), so it is only kept if o < changed. Same as
+        # bisect_left on the offsets, without building a list of them.
+        checkpoints = self._checkpoints
+        low, high = 0, len(checkpoints)
+        while low < high:
+            mid = (low + high) // 2
+            if checkpoints[mid].offset < changed:
+                low = mid + 1
+            else:
+                high = mid
+        del checkpoints[max(low, 1) :]
+
+        last = self._checkpoints[-1]
+        del self._cmds[last.cmds_len :]
+        del self._eval_states[last.cmds_len + 1 :]
+
+    def _convert_from(self, expr: str):
+        """Continues converting expr from the last checkpoint"""
+        last = self._checkpoints[-1]
+        if last.error is not None:
+            return
+
+        cmds = self._cmds
+        op_stack = last.op_stack
+        tokenizer = MathTokenizer(expr, last.offset)
+
+        # Same as the loop in `PostfixStream`
+        for token, t_type in tokenizer:
+            error: Optional[str] = None
+            if t_type == "invalid":
+                error = "Invalid character"
+
+            elif t_type == "num":
+                cmds.append(token)
+
+            elif token == "(":
+                op_stack = (token, op_stack)
+
+            elif token == ")":
+                if op_stack is None:
+                    error = "Missing opening parenthesis"
+                else:
+                    last_op, op_stack = op_stack
+                    while last_op != "(":
+                        cmds.append(last_op)
+                        if op_stack is None:
+                            error = "Missing opening parenthesis"
+                            break
+                        last_op, op_stack = op_stack
+
+            else:
+                while op_stack is not None:
+                    last_op, rest = op_stack
+                    if (
+                        PRECEDENCE[token] > PRECEDENCE[last_op]
+                        or last_op == "("
+                        or (last_op == token and token == "$")
+                    ):
+                        break
+
+                    cmds.append(last_op)
+                    op_stack = rest
+
+                op_stack = (token, op_stack)
+
+            self._checkpoints.append(
+                _Checkpoint(tokenizer.offset, len(cmds), op_stack, error)
+            )
+            if error is not None:
+                return
+
+    def update(self, expr: str) -> tuple[list[str], Optional[str]]:
+        """Converts expr, same as `convert(expr)`
+
+        The returned list is reused by the next update, copy it to keep it."""
+        self._restore(common_prefix(self._expr, expr))
+        self._expr = expr
+        self._convert_from(expr)
+
+        # The flushed operators of the last update were dropped by _restore
+        last = self._checkpoints[-1]
+        cmds = self._cmds
+        self._cmds_len = len(cmds)
+        if last.error is not None:
+            return cmds, last.error
+
+        # Clear all remainding operator stack
+        op_stack = last.op_stack
+        while op_stack is not None:
+            op, op_stack = op_stack
+            if op == "(":
+                return cmds, "Missing closing parenthesis"
+            cmds.append(op)
+
+        return cmds, None
+
+    def evaluate(self) -> tuple[int, Optional[str]]:
+        """Evaluates the last update, same as `evaluate(cmds)`"""
+        states = self._eval_states
+        cmds = self._cmds
+
+        # Saved states cover the checkpointed commands, whatever comes after
+        # (the flushed operator stack) changes with every update
+        state = states[-1]
+        for i in range(len(states) - 1, len(cmds)):
+            state = self._step(state, cmds[i])
+            if i < self._cmds_len:
+                states.append(state)
+
+        if state.result is not None:
+            return state.result
+
+        if state.num_stack is None:
+            raise IndexError("pop from empty list")
+
+        # Values are (exact, reduced) pairs in mod N mode
+        value = state.num_stack[0]
+        if self.modulus is not None:
+            value = value[1]
+
+        if state.depth != 1:
+            return value, "Missing operator"
+        return value, None
+
+    def _step(self, state: _EvalState, token: str) -> _EvalState:
+        """Evaluator state after one more command, same as in `evaluate`"""
+        if state.result is not None:
+            return state
+
+        num_stack, depth = state.num_stack, state.depth
+        modulus = self.modulus
+        if token.isdigit():
+            value = int(token)
+            if modulus is not None:
+                value = mod_value(value, modulus, self.max_bits)
+            return _EvalState((value, num_stack), depth + 1, None)
+
+        if num_stack is None:
+            return _EvalState(None, 0, (0, "Missing operand"))
+        second, num_stack = num_stack
+
+        if num_stack is None:
+            value = second if modulus is None else second[1]
+            return _EvalState(None, 0, (value, "Missing operand"))
+        first, num_stack = num_stack
+
+        try:
+            if modulus is None:
+                result = eval_math(first, second, token, self.max_bits)
+            else:
+                result = eval_mod(first, second, token, modulus, self.max_bits)
+        except (ZeroDivisionError, OverflowError) as e:
+            error = "Zero division" if isinstance(e, ZeroDivisionError) else None
+            value = first if modulus is None else first[1]
+            return _EvalState(None, 0, (value, error or "Result too large"))
+
+        return _EvalState((result, num_stack), depth - 1, None)
@@ -1,13 +1,44 @@
+import multiprocessing as mp
 import tkinter as tk
+from multiprocessing.connection import Connection
 from typing import Optional
 
-from converter import convert, evaluate
+from converter import DEFAULT_MAX_BITS, evaluate
+from incremental import IncrementalParser
+
+# Time to wait after the last keystroke before starting a background
+# evaluation, and between checks on a running one (ms)
+DEBOUNCE_MS = 150
+POLL_MS = 25
+
+
+def evaluate_worker(
+    cmds: list[str],
+    conn: Connection,
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+):
+    """Evaluates cmds in a worker process and sends (value, error) back"""
+    try:
+        conn.send(evaluate(cmds, max_bits, modulus))
+    except Exception as e:
+        conn.send(("", str(e)))
+    conn.close()
 
 
 class MainWindow(tk.Frame):
     def __init__(self, master: Optional[tk.Misc] = None):
         super().__init__(master)
 
+        # Keeps the parse of the previous input, so every keystroke only
+        # re-parses from the first changed character
+        self._parser = IncrementalParser()
+
+        # State of the background evaluation, see start_eval
+        self._worker: Optional[mp.Process] = None
+        self._conn: Optional[Connection] = None
+        self._after_id: Optional[str] = None
+
         # Expand on resize
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure("all", weight=1)
@@ -19,31 +50,64 @@ class MainWindow(tk.Frame):
         self._expr = tk.StringVar(self)
         self._expr.trace("w", lambda _, __, ___: self.on_change())
 
+        # Evaluation options, see `evaluate`
+        self._max_bits = tk.StringVar(self, str(DEFAULT_MAX_BITS))
+        self._max_bits.trace("w", lambda _, __, ___: self.on_change())
+        self._modulus = tk.StringVar(self)
+        self._modulus.trace("w", lambda _, __, ___: self.on_change())
+
         # Label definitions
         self.infix_lbl = tk.Label(self, text="Infix Expression:")
         self.postfix_lbl = tk.Label(self, text="Postfix Expression:")
         self.value_lbl = tk.Label(self, text="Value:")
         self.error_lbl = tk.Label(self, text="Errors:")
+        self.max_bits_lbl = tk.Label(self, text="Limit (bits):")
+        self.modulus_lbl = tk.Label(self, text="Mod:")
 
         # Result labels and input definition
         self.infix = tk.Entry(self, textvariable=self._expr)
         self.postfix = tk.Label(self)
         self.value = tk.Label(self)
         self.errors = tk.Label(self)
+        self.max_bits = tk.Entry(self, textvariable=self._max_bits)
+        self.modulus = tk.Entry(self, textvariable=self._modulus)
 
         # Putting widgets into place
         self.infix_lbl.grid(column=0, row=0, padx=5, pady=5, sticky="e")
         self.postfix_lbl.grid(column=0, row=1, padx=5, pady=5, sticky="e")
         self.value_lbl.grid(column=0, row=2, padx=5, pady=5, sticky="e")
         self.error_lbl.grid(column=0, row=3, padx=5, pady=5, sticky="e")
+        self.max_bits_lbl.grid(column=0, row=4, padx=5, pady=5, sticky="e")
+        self.modulus_lbl.grid(column=0, row=5, padx=5, pady=5, sticky="e")
 
         self.infix.grid(column=1, row=0, padx=5, pady=5, sticky="news")
         self.postfix.grid(column=1, row=1, padx=5, pady=5, sticky="w")
         self.value.grid(column=1, row=2, padx=5, pady=5, sticky="w")
         self.errors.grid(column=1, row=3, padx=5, pady=5, sticky="w")
+        self.max_bits.grid(column=1, row=4, padx=5, pady=5, sticky="w")
+        self.modulus.grid(column=1, row=5, padx=5, pady=5, sticky="w")
+
+    def read_options(self) -> tuple[Optional[int], Optional[int]]:
+        """Reads (max_bits, modulus), empty means no limit / no modulus
+
+        Raises:
+            ValueError: if an option is not a positive number.
+        """
+        options: list[Optional[int]] = []
+        for var in (self._max_bits, self._modulus):
+            text = var.get().strip()
+            if not text:
+                options.append(None)
+            elif text.isdigit() and int(text) > 0:
+                options.append(int(text))
+            else:
+                raise ValueError("Invalid option")
+        return options[0], options[1]
 
     def on_change(self):
-        # Triggers on any change in input
+        # Triggers on any change in input, any running evaluation is stale now
+        self.cancel_eval()
+
         expr = self._expr.get()
         if not expr:
             # Expression input is empty, just reset
@@ -53,19 +117,39 @@ class MainWindow(tk.Frame):
 
         errors: list[str] = []
 
+        # Options that are not valid are ignored, and reported as an error
+        try:
+            max_bits, modulus = self.read_options()
+        except ValueError as e:
+            errors.append(str(e))
+            max_bits, modulus = DEFAULT_MAX_BITS, None
+        self._parser.set_mode(max_bits, modulus)
+
         # Everything below is golang styled, sorry
         # Convert infix to postfix
-        expr_cmds, err = convert(expr)
+        expr_cmds, err = self._parser.update(expr)
         if err:
             errors.append(err)
 
+        if expr_cmds and "$" in expr_cmds:
+            # Powers can take arbitrarily long, so they are evaluated in
+            # another process once typing stops, see start_eval
+            self.errors.configure(text=", ".join(errors))
+            self.postfix.configure(text=" ".join(expr_cmds))
+            self.value.configure(text="computing…")
+            self._after_id = self.after(
+                DEBOUNCE_MS,
+                lambda: self.start_eval(expr_cmds, errors, max_bits, modulus),
+            )
+            return
+
         if expr_cmds:
             # This is run even if there is error, as long as convert
             # can still parse it as best as it can
             expr_cmds_str = " ".join(expr_cmds)
 
             # Evauate the infix form
-            expr_val, err = evaluate(expr_cmds)
+            expr_val, err = self._parser.evaluate()
             if err:
                 errors.append(err)
         else:
@@ -78,12 +162,68 @@ class MainWindow(tk.Frame):
         self.postfix.configure(text=expr_cmds_str)
         self.value.configure(text=expr_val)
 
+    def start_eval(
+        self,
+        cmds: list[str],
+        errors: list[str],
+        max_bits: Optional[int],
+        modulus: Optional[int],
+    ):
+        """Evaluates cmds in a worker process, so Tk never blocks"""
+        self._conn, child_conn = mp.Pipe(duplex=False)
+        self._worker = mp.Process(
+            target=evaluate_worker,
+            args=(cmds, child_conn, max_bits, modulus),
+            daemon=True,
+        )
+        self._worker.start()
+        child_conn.close()
+
+        self._after_id = self.after(POLL_MS, lambda: self.poll_eval(errors))
+
+    def poll_eval(self, errors: list[str]):
+        """Shows the result of the worker once it is done"""
+        if self._conn is None:
+            return
+
+        if not self._conn.poll():
+            self._after_id = self.after(POLL_MS, lambda: self.poll_eval(errors))
+            return
+
+        try:
+            expr_val, err = self._conn.recv()
+        except EOFError:
+            # The worker died without an answer (e.g. out of memory)
+            expr_val, err = "", "Evaluation failed"
+        self.cancel_eval()
+
+        if err:
+            errors = errors + [err]
+        self.errors.configure(text=", ".join(errors))
+        self.value.configure(text=expr_val)
+
+    def cancel_eval(self):
+        """Stops any scheduled or running evaluation"""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+        if self._worker is not None:
+            if self._worker.is_alive():
+                self._worker.terminate()
+            self._worker.join()
+            self._worker = None
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
 
 def main():
     """Main entry"""
     app = MainWindow()
     app.master.title("Infix-Postfix Converter")  # type: ignore
-    app.master.geometry("500x125")  # type: ignore
+    app.master.geometry("500x190")  # type: ignore
     app.mainloop()
 
 
@@ -1,3 +1,4 @@
+import re
 from typing import Literal
 
 
@@ -11,63 +12,65 @@ class MathTokenizer:
     until StopIteration() is raised in __next__"""
 
     OPERATORS = ("+", "-", "*", "/", "$", "(", ")")
+    OPERATOR_RE = re.compile(r"[+\-*/$()]")
 
-    def __init__(self, expr: str):
+    def __init__(self, expr: str, start: int = 0):
         self._expr = expr
-        self._curr_idx = 0
+        self._start = start
+        self._curr_idx = start
 
     def __iter__(self):
-        self._curr_idx = 0
+        self._curr_idx = self._start
         return self
 
+    @property
+    def offset(self) -> int:
+        """Index of the next character to process.
+
+        Only characters before this index have been looked at to produce the
+        tokens so far, except that an operand is only known to be finished
+        once the character at this index (an operator, or the end) is seen."""
+        return self._curr_idx
+
     def __next__(self) -> tuple[str, TokenType]:
-        # valid_token here means that there is still characters to process
-        # in current token.
-        valid_token = True
-        result = ""
+        expr = self._expr
+        start = self._curr_idx
 
         # We are at the end of the string, let's stop.
-        if self._curr_idx == len(self._expr):
+        if start == len(expr):
             raise StopIteration()
 
-        # Loop until either we reach the end of the string, or current character
-        # does no longer belong to previous token.
-        while self._curr_idx != len(self._expr) and valid_token:
-            curr = self._expr[self._curr_idx]
-
-            # Skip whitespace
-            if curr == " ":
-                self._curr_idx += 1
-                continue
-
-            # See if current character is an operator or operand
-            if curr in self.OPERATORS:
-                # If it is, and buffer is empty, shift to next character
-                # and mark next character as new token, therefore returning current op.
-
-                # Else, mark current character as new token, but does NOT
-                # shift the pointer, instead let next iteration do the above.
-                # This makes sure that current token and previous token is returned properly.
-                valid_token = False
-                if result == "":
-                    result += curr
-                    self._curr_idx += 1
-
-            # This is an operand, simply add the character to the buffer.
-            else:
-                result += curr
-                self._curr_idx += 1
-
-        # If the result is empty, that means we are only processing
-        # whitespaces at the end of the string, so let's just stop.
-        if result == "":
-            raise StopIteration()
+        # Operators are always a single character token
+        curr = expr[start]
+        if curr in self.OPERATORS:
+            self._curr_idx = start + 1
+            return (curr, "op")
+
+        # Find where the next operator is, everything before it belongs to
+        # the current operand, so it can be sliced out all at once.
+        match = self.OPERATOR_RE.search(expr, start)
+        end = match.start() if match else len(expr)
 
-        # Set token type whether if its an operand, operator, or invalid.
-        t_type: TokenType = "invalid"
-        if result in self.OPERATORS:
-            t_type = "op"
-        elif result.isdigit():
-            t_type = "num"
+        # Whitespaces are skipped, even in the middle of an operand.
+        result = expr[start:end]
+        if " " in result:
+            result = result.replace(" ", "")
 
+        if result == "":
+            # If the result is empty, that means we are only processing
+            # whitespaces at the end of the string, so let's just stop.
+            if match is None:
+                self._curr_idx = end
+                raise StopIteration()
+
+            # Otherwise there is nothing before the operator, so return the
+            # operator itself and shift to next character.
+            self._curr_idx = end + 1
+            return (match.group(), "op")
+
+        # Mark the operator (if any) as the start of next token
+        self._curr_idx = end
+
+        # Set token type whether if its an operand or invalid.
+        t_type: TokenType = "num" if result.isdigit() else "invalid"
         return (result, t_type)
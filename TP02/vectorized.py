@@ -0,0 +1,176 @@
+"""Evaluates many postfix expressions at once with NumPy.
+
+Expressions that only differ in their numbers share a signature (their
+space separated postfix commands with every digit removed). Every group of such
+expressions is evaluated as one program over int64 columns, one column per
+number in the expression, one lane per expression.
+
+Lanes that could overflow int64, divide by zero or raise to a negative power
+are flagged before each operation and evaluated again with the exact scalar
+`evaluate`, so the results are always the same as evaluating one by one."""
+
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import Optional
+
+import numpy as np
+
+from converter import evaluate
+
+# Values are only kept in int64 while they fit this many bits, so that
+# none of the operations below can overflow
+SAFE_BITS = 62
+
+# Numbers with at most this many digits always fit in SAFE_BITS
+SAFE_DIGITS = 18
+
+DIGITS = b"0123456789"
+
+OPERATIONS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.floor_divide,
+    "$": np.power,
+}
+
+
+def signature(cmds: list[str]) -> bytes:
+    """Postfix commands, space separated, with every digit removed.
+
+    Numbers become empty commands, and operators are single characters, so
+    the spaces left in between still tell where every number was."""
+    return " ".join(cmds).encode().translate(None, DIGITS)
+
+
+def is_well_formed(sig: bytes) -> bool:
+    """Check if evaluating sig can not hit "Missing operand" / "operator"
+
+    Those errors only depend on the signature, and their partial results are
+    simply left to the scalar path."""
+    depth = 0
+    for token in sig.decode().split(" "):
+        if token == "":
+            depth += 1
+        elif depth < 2 or token not in OPERATIONS:
+            return False
+        else:
+            depth -= 1
+    return depth == 1
+
+
+def bit_length(values: np.ndarray) -> np.ndarray:
+    """int.bit_length of every value, possibly one too high for values
+    close to a power of two (never too low)"""
+    _, exponent = np.frexp(np.abs(values).astype(np.float64))
+    return exponent
+
+
+def result_bits(left: np.ndarray, right: np.ndarray, op: str) -> np.ndarray:
+    """Same as `converter.result_bits`, for whole columns"""
+    left_bits = bit_length(left)
+    if op in ("+", "-"):
+        return np.maximum(left_bits, bit_length(right)) + 1
+    elif op == "*":
+        return left_bits + bit_length(right)
+    elif op == "/":
+        return left_bits
+
+    with np.errstate(divide="ignore"):
+        bits = np.floor(right * np.log2(np.abs(left).astype(np.float64))) + 1
+    return np.where((right <= 0) | (np.abs(left) <= 1), 1, bits)
+
+
+def evaluate_group(
+    cmds_list: list[list[str]], max_bits: Optional[int] = None
+) -> list[tuple[int, Optional[str]]]:
+    """Evaluates expressions that all share one well formed signature"""
+    sig = signature(cmds_list[0]).decode().split(" ")
+    lanes = len(cmds_list)
+
+    # Numbers are at the same positions in every expression of the group,
+    # read them lane by lane into one flat list
+    positions = [i for i, token in enumerate(sig) if token == ""]
+    if len(positions) > 1:
+        digits = list(chain.from_iterable(map(itemgetter(*positions), cmds_list)))
+    else:
+        digits = list(map(itemgetter(positions[0]), cmds_list))
+    count = len(digits)
+
+    # Numbers too long to be safe are left to the scalar path
+    lengths = np.fromiter(map(len, digits), dtype=np.int64, count=count)
+    too_long = np.flatnonzero(lengths > SAFE_DIGITS)
+    for i in too_long.tolist():
+        digits[i] = "0"
+    unsafe = np.zeros(lanes, dtype=bool)
+    unsafe[too_long // len(positions)] = True
+
+    values = np.fromiter(map(int, digits), dtype=np.int64, count=count)
+    columns = iter(values.reshape(lanes, len(positions)).T)
+
+    stack: list[np.ndarray] = []
+    for token in sig:
+        if token == "":
+            stack.append(next(columns))
+            continue
+
+        second = stack.pop()
+        first = stack.pop()
+
+        # Flag the lanes the scalar path has to redo, then make their
+        # operands harmless so that the whole column can be computed
+        with np.errstate(invalid="ignore"):
+            unsafe |= result_bits(first, second, token) > SAFE_BITS
+        if token == "/":
+            unsafe |= second == 0
+        elif token == "$":
+            unsafe |= second < 0
+        first = np.where(unsafe, 1, first)
+        second = np.where(unsafe, 1, second)
+
+        stack.append(OPERATIONS[token](first, second))
+
+    results: list[tuple[int, Optional[str]]] = list(
+        zip(stack.pop().tolist(), repeat(None))
+    )
+    for i in np.flatnonzero(unsafe).tolist():
+        results[i] = evaluate(cmds_list[i], max_bits)
+    return results
+
+
+def evaluate_many(
+    cmds_list: list[list[str]],
+    max_bits: Optional[int] = None,
+    modulus: Optional[int] = None,
+) -> list[tuple[int, Optional[str]]]:
+    """Same as `[evaluate(cmds, max_bits, modulus) for cmds in cmds_list]`"""
+    # Both options need exact big integers, which NumPy does not have. A
+    # max_bits above SAFE_BITS (with room for rounding in the estimates) can
+    # never refuse a lane that is safe here.
+    if modulus is not None or (max_bits is not None and max_bits < SAFE_BITS + 2):
+        return [evaluate(cmds, max_bits, modulus) for cmds in cmds_list]
+
+    groups: dict[bytes, list[int]] = {}
+    for i, sig in enumerate(map(signature, cmds_list)):
+        groups.setdefault(sig, []).append(i)
+
+    if len(groups) == 1:
+        # Common case of a file of same shaped expressions, no need to
+        # gather and scatter
+        sig = next(iter(groups))
+        if len(cmds_list) > 1 and is_well_formed(sig):
+            return evaluate_group(cmds_list, max_bits)
+        return [evaluate(cmds, max_bits) for cmds in cmds_list]
+
+    results: list[tuple[int, Optional[str]]] = [(0, None)] * len(cmds_list)
+    for sig, indices in groups.items():
+        group = [cmds_list[i] for i in indices]
+        if len(group) > 1 and is_well_formed(sig):
+            group_results = evaluate_group(group, max_bits)
+        else:
+            group_results = [evaluate(cmds, max_bits) for cmds in group]
+
+        for i, result in zip(indices, group_results):
+            results[i] = result
+
+    return results
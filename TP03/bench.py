@@ -0,0 +1,110 @@
+"""Times edits at the pointer on every backend at growing list sizes.
+
+For every size n, a list of n nodes is built with the pointer in the middle,
+then n // EDITS_RATIO edits are made right next to the pointer and the time
+per edit is reported. Those edits are amortized O(1) (O(log n) on the linked
+and persistent backends), so the time per edit should stay about flat as n
+grows. The scaling exponent (slope of log(time) over log(n)) is flagged
+above FLAT.
+
+The number of edits grows with n, so the cost of an occasional O(n) resize
+is spread the same way at every size.
+
+Run with `python bench.py [max size] [--backend NAME] [--edit NAME]`, the
+max size defaults to 80k nodes."""
+
+import argparse
+import math
+import time
+from typing import Callable, Dict, List
+
+from tp03 import BACKENDS, ListBackend
+
+
+def insert_remove_next(dlist: ListBackend):
+    dlist.insert_pointer("NEXT", "x")
+    dlist.remove_pointer("NEXT")
+
+
+# One edit next to the pointer, done EDITS times in a row
+EDIT_KINDS: Dict[str, Callable[[ListBackend], None]] = {
+    "insert next": lambda dlist: dlist.insert_pointer("NEXT", "x"),
+    "insert prev": lambda dlist: dlist.insert_pointer("PREV", "x"),
+    "insert and remove next": insert_remove_next,
+}
+
+# Number of sizes, each half the next one
+STEPS = 4
+
+# One edit is timed per this many nodes of the list
+EDITS_RATIO = 4
+
+# Runs per measure, each on a new list, the fastest one is kept
+REPEAT = 3
+
+# Exponents above this are flagged, O(log n) edits stay well below it
+FLAT = 0.3
+
+
+def scaling_exponent(sizes: List[int], secs: List[float]) -> float:
+    """Least squares slope of log(secs) over log(sizes)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(sec, 1e-9)) for sec in secs]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    return num / den if den else 0.0
+
+
+def measure(backend: str, edit: str, size: int) -> float:
+    """Best seconds per edit, on a list of size nodes"""
+    run = EDIT_KINDS[edit]
+    edits = max(size // EDITS_RATIO, 1)
+
+    best = math.inf
+    for _ in range(REPEAT):
+        dlist = BACKENDS[backend](None)
+        dlist.extend_tail([str(i) for i in range(size)])
+        dlist.move_pointer("NEXT", size // 2)
+
+        start = time.perf_counter()
+        for _ in range(edits):
+            run(dlist)
+        best = min(best, (time.perf_counter() - start) / edits)
+    return best
+
+
+def bench(backend: str, edit: str, max_size: int):
+    """Runs one edit on one backend at every size and prints the results"""
+    print(f"{backend} / {edit}:")
+
+    sizes: List[int] = []
+    times: List[float] = []
+    for step in reversed(range(STEPS)):
+        size = max_size >> step
+        secs = measure(backend, edit, size)
+
+        sizes.append(size)
+        times.append(secs)
+        print(f"    {size:>10} nodes: {secs * 1e6:8.2f}us per edit")
+
+    exponent = scaling_exponent(sizes, times)
+    flag = "  <- grows with n" if exponent > FLAT else ""
+    print(f"    scaling exponent: {exponent:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("max_size", nargs="?", type=int, default=80_000)
+    parser.add_argument("--backend", choices=tuple(BACKENDS), action="append")
+    parser.add_argument("--edit", choices=tuple(EDIT_KINDS), action="append")
+    opts = parser.parse_args()
+
+    for backend in opts.backend or BACKENDS:
+        for edit in opts.edit or EDIT_KINDS:
+            bench(backend, edit, opts.max_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,529 @@
-from typing import Callable, Dict, List, Literal, Optional, Tuple
+import argparse
+import random
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from itertools import chain, repeat
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 ArrowValue = Literal["PREV", "NEXT"]
 
+# Maximum number of index levels above the nodes, enough for 2 ** 32 nodes
+MAX_LEVELS = 32
+
+# Moves of at most this many steps simply walk the nodes
+WALK_STEPS = 8
+
+# Slots of the head and tail of an ArenaList, and the link to no node
+ARENA_HEAD = 0
+ARENA_TAIL = 1
+NO_NODE = -1
+
+# Smallest number of slots an ArenaList grows by
+ARENA_MIN_GROWTH = 16
+
+# Smallest capacity of a GapBufferList
+GAP_MIN_CAPACITY = 16
+
+# Number of rendered nodes per block of a ListRope, blocks are split once
+# they grow to twice this
+ROPE_BLOCK = 512
+
 
 class Node:
     """Represents a node in linked list"""
 
-    __slot__ = ("value", "previous", "next")
+    __slots__ = ("value", "previous", "next", "skips", "widths")
 
     def __init__(
         self,
         value: str,
         previous: Optional["Node"],
         next: Optional["Node"],
+        levels: int = 0,
     ):
         self.value = value
         self.previous = previous
         self.next = next
 
+        # Skip list tower: on every index level, the next node that is on
+        # that level too, and how many positions away it is
+        self.skips: List[Optional["Node"]] = [None] * levels
+        self.widths: List[int] = [0] * levels
+
+
+def render_node(value: str) -> str:
+    """Renders one node"""
+    return f"['{value}']"
+
+
+def mark_node(fragment: str) -> str:
+    """Adds the pointer mark to a rendered node"""
+    return fragment[:-1] + " (P)]"
+
+
+def render_nodes(values: List[str]) -> str:
+    """Renders nodes joined by arrows, in one join"""
+    return "['" + "']<->['".join(values) + "']" if values else ""
 
-class DoublyLinkedList:
-    """Doubly linked list implementation"""
 
-    __slot__ = ("head", "tail", "pointer", "size")
+def render_window(
+    nodes: Callable[[int, int], str],
+    pointer: int,
+    size: int,
+    window: Optional[int] = None,
+    head: str = "_HEAD",
+    tail: str = "_TAIL",
+) -> str:
+    """Same as `DoublyLinkedList.render`, for any backend that can render
+    its nodes from position start up to (not including) stop, joined by
+    arrows. Positions count from the head, nodes are 1 to size."""
+    last = size + 1
+
+    # Positions shown, both included
+    start, stop = 0, last
+    if window is not None:
+        start = max(pointer - window, 0)
+        stop = min(pointer + window, last)
+
+    def span(first: int, end: int) -> str:
+        """Positions first up to (not including) end, head and tail too"""
+        if first >= end:
+            return ""
+
+        parts = []
+        if first == 0:
+            parts.append(render_node(head))
+        if max(first, 1) < min(end, last):
+            parts.append(nodes(max(first, 1), min(end, last)))
+        if end > last:
+            parts.append(render_node(tail))
+        return "<->".join(parts)
+
+    parts = [
+        "..." if start > 0 else "",
+        span(start, pointer),
+        mark_node(span(pointer, pointer + 1)),
+        span(pointer + 1, stop + 1),
+        "..." if stop < last else "",
+    ]
+    return "<->".join(part for part in parts if part)
+
+
+class ListRope:
+    """Rendered nodes of a list, in order, kept up to date as it changes.
+
+    Nodes are rendered once, when inserted, into blocks of about ROPE_BLOCK
+    fragments, and every block caches its fragments joined together. A
+    change only touches one block, so rendering the whole list again only
+    joins the cached blocks. Positions count from 0 here."""
 
     def __init__(self) -> None:
+        self.size = 0
+        self._blocks: List[List[str]] = [[]]
+        self._joined: List[Optional[str]] = [""]
+        # Fenwick tree of block sizes, rebuilt when blocks are split or
+        # dropped
+        self._tree: Optional[List[int]] = None
+
+    def _build_tree(self) -> List[int]:
+        tree = [0] + [len(fragments) for fragments in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        return tree
+
+    def _add(self, block: int, delta: int):
+        """Adds delta to the size of block in the Fenwick tree"""
+        tree = self._tree
+        if tree is None:
+            return
+        i = block + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(block, position in block) of the node at index"""
+        if self._tree is None:
+            self._tree = self._build_tree()
+        tree = self._tree
+
+        # Largest number of whole blocks before index
+        block, rest = 0, index
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            if block + step < len(tree) and tree[block + step] <= rest:
+                block += step
+                rest -= tree[block]
+            step >>= 1
+
+        # Past the last node, which is where nodes are appended
+        if block == len(self._blocks):
+            block -= 1
+            rest = len(self._blocks[block])
+        return block, rest
+
+    def insert(self, index: int, value: str):
+        """Inserts the node at index"""
+        block, i = self._locate(index)
+        fragments = self._blocks[block]
+        fragments.insert(i, render_node(value))
+        self._joined[block] = None
+
+        if len(fragments) >= 2 * ROPE_BLOCK:
+            self._blocks[block : block + 1] = [
+                fragments[:ROPE_BLOCK],
+                fragments[ROPE_BLOCK:],
+            ]
+            self._joined[block : block + 1] = [None, None]
+            self._tree = None
+        else:
+            self._add(block, 1)
+        self.size += 1
+
+    def insert_many(self, index: int, values: Sequence[str]):
+        """Inserts the nodes at index, index + 1, ..."""
+        block, i = self._locate(index)
+        fragments = self._blocks[block]
+        fragments[i:i] = map(render_node, values)
+        self._joined[block] = None
+
+        if len(fragments) >= 2 * ROPE_BLOCK:
+            pieces = [
+                fragments[start : start + ROPE_BLOCK]
+                for start in range(0, len(fragments), ROPE_BLOCK)
+            ]
+            self._blocks[block : block + 1] = pieces
+            self._joined[block : block + 1] = [None] * len(pieces)
+            self._tree = None
+        else:
+            self._add(block, len(values))
+        self.size += len(values)
+
+    def remove_many(self, index: int, count: int):
+        """Removes count nodes from index onward"""
+        self.size -= count
+        while count:
+            block, i = self._locate(index)
+            fragments = self._blocks[block]
+            removed = min(count, len(fragments) - i)
+            del fragments[i : i + removed]
+            self._joined[block] = None
+            count -= removed
+
+            if not fragments and len(self._blocks) > 1:
+                del self._blocks[block]
+                del self._joined[block]
+                self._tree = None
+            else:
+                self._add(block, -removed)
+
+    def remove(self, index: int):
+        """Removes the node at index"""
+        block, i = self._locate(index)
+        fragments = self._blocks[block]
+        del fragments[i]
+        self._joined[block] = None
+
+        # Blocks are never empty, except the last one of an empty list
+        if not fragments and len(self._blocks) > 1:
+            del self._blocks[block]
+            del self._joined[block]
+            self._tree = None
+        else:
+            self._add(block, -1)
+        self.size -= 1
+
+    def join(self, pointer: int = -1) -> str:
+        """All nodes joined by arrows, with the node at pointer marked"""
+        mark_block, mark = (-1, 0)
+        if 0 <= pointer < self.size:
+            mark_block, mark = self._locate(pointer)
+
+        parts: List[str] = []
+        for block, fragments in enumerate(self._blocks):
+            if block == mark_block:
+                marked = mark_node(fragments[mark])
+                parts.append(
+                    "<->".join(
+                        chain(fragments[:mark], (marked,), fragments[mark + 1 :])
+                    )
+                )
+                continue
+
+            joined = self._joined[block]
+            if joined is None:
+                joined = self._joined[block] = "<->".join(fragments)
+            parts.append(joined)
+
+        return "<->".join(part for part in parts if part)
+
+    def fragments(self, start: int, stop: int) -> List[str]:
+        """Rendered nodes from start up to (not including) stop"""
+        result: List[str] = []
+        if start >= stop:
+            return result
+
+        block, i = self._locate(start)
+        while len(result) < stop - start:
+            fragments = self._blocks[block]
+            result.extend(fragments[i : i + stop - start - len(result)])
+            block, i = block + 1, 0
+        return result
+
+    def render(self, pointer: int, window: Optional[int], head: str, tail: str) -> str:
+        """Renders a whole list made of the head, these nodes and the tail,
+        see `DoublyLinkedList.render`. Positions count from the head here."""
+        if window is not None:
+            # Nodes are at position - 1 here
+            return render_window(
+                lambda start, stop: "<->".join(self.fragments(start - 1, stop - 1)),
+                pointer,
+                self.size,
+                window,
+                head,
+                tail,
+            )
+
+        # The whole list reuses the joined blocks
+        last = self.size + 1
+        head = render_node(head)
+        tail = render_node(tail)
+        parts = [
+            mark_node(head) if pointer == 0 else head,
+            self.join(pointer - 1),
+            mark_node(tail) if pointer == last else tail,
+        ]
+        return "<->".join(part for part in parts if part)
+
+
+class BulkCommands(ABC):
+    """Bulk commands of every backend, on top of their `_insert_run` and
+    `_remove_run`, which splice a whole run of nodes at once. A backend
+    missing either one can not be instantiated."""
+
+    __slots__ = ()
+
+    pointer_index: int
+    size: int
+
+    @abstractmethod
+    def _insert_run(self, index: int, values: Sequence[str]):
+        """Inserts nodes with values at positions index, index + 1, ..."""
+
+    @abstractmethod
+    def _remove_run(self, index: int, count: int):
+        """Removes the count nodes from position index onward"""
+
+    def extend_head(self, values: Sequence[str]):
+        """Inserts nodes after head, in order"""
+        self._insert_run(1, values)
+
+    def extend_tail(self, values: Sequence[str]):
+        """Inserts nodes before tail, in order"""
+        self._insert_run(self.size + 1, values)
+
+    def insert_pointer_many(self, arrow: ArrowValue, values: Sequence[str]):
+        """Inserts nodes next to the pointer, in order, based on arrow"""
+        if arrow == "NEXT":
+            if self.pointer_index == self.size + 1:
+                raise IndexError("Insertion out of bound error")
+            self._insert_run(self.pointer_index + 1, values)
+        else:
+            if self.pointer_index == 0:
+                raise IndexError("Insertion out of bound error")
+            self._insert_run(self.pointer_index, values)
+
+    def remove_pointer_many(self, arrow: ArrowValue, count: int):
+        """Removes count nodes next to the pointer, based on arrow"""
+        count = int(count)
+        if arrow == "NEXT":
+            if self.pointer_index == self.size + 1:
+                raise ValueError("Tail do not have next node")
+            start = self.pointer_index + 1
+        else:
+            if self.pointer_index == 0:
+                raise ValueError("Head do not have previous node")
+            start = self.pointer_index - count
+
+        # The whole run must be nodes, checked before removing any
+        if start < 1 or start + count - 1 > self.size:
+            raise ValueError("Unable to remove head or tail")
+        self._remove_run(start, count)
+
+
+class DoublyLinkedList(BulkCommands):
+    """Doubly linked list implementation
+
+    Nodes are also indexed by an indexable skip list, so that the node at
+    any position is found in O(log n). Positions count from the head, which
+    is at 0, so the tail is at size + 1.
+
+    The list is rendered through a ListRope. If window is given, str() only
+    shows the nodes at most window positions away from the pointer."""
+
+    __slots__ = (
+        "head",
+        "tail",
+        "pointer",
+        "pointer_index",
+        "size",
+        "window",
+        "_levels",
+        "_random",
+        "_rope",
+    )
+
+    def __init__(self, window: Optional[int] = None) -> None:
         # Initialize linked list with head and t ail
-        self.head = Node("_HEAD", None, None)
-        self.tail = Node("_TAIL", None, None)
+        self.head = Node("_HEAD", None, None, MAX_LEVELS)
+        self.tail = Node("_TAIL", None, None, MAX_LEVELS)
 
         # Link head and tail
         self.head.next = self.tail
         self.tail.previous = self.head
 
+        # Tail ends every index level, and is never skipped over
+        self.head.skips = [self.tail] * MAX_LEVELS
+        self.head.widths = [1] * MAX_LEVELS
+        self.tail.widths = [sys.maxsize] * MAX_LEVELS
+
         # Set pointer and size to default
         self.pointer = self.head
+        self.pointer_index = 0
         self.size = 0
 
+        # Number of index levels in use
+        self._levels = 0
+        self._random = random.Random()
+
+        self.window = window
+        self._rope = ListRope()
+
     def __str__(self) -> str:
-        result = ""
-        pointer: Optional[Node] = self.head
-        while pointer is not None:
-            # Create the "bridge" between each node, as long as its
-            # not the head
-            if pointer != self.head:
-                result += "<->"
-
-            # Add the bracket and the value
-            result += f"['{pointer.value}'"
-            if self.pointer == pointer:
-                # If the pointer points here, also add the mark
-                result += " (P)"
-            result += "]"
-
-            # Continue with next pointer until None
-            pointer = pointer.next
-        return result
+        return self.render(self.window)
+
+    def render(self, window: Optional[int] = None) -> str:
+        """Renders the list, or only the nodes at most window positions away
+        from the pointer, with "..." for the nodes left out"""
+        return self._rope.render(
+            self.pointer_index, window, self.head.value, self.tail.value
+        )
+
+    def _random_levels(self) -> int:
+        """Number of index levels of a new node, each one half as likely"""
+        levels = 0
+        while levels < MAX_LEVELS and self._random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def _index_insert(self, new_node: Node, index: int):
+        """Adds new_node, now at index, to the index levels"""
+        levels = len(new_node.skips)
+        if levels > self._levels:
+            # Unused levels only link head to tail, over the old nodes
+            for level in range(self._levels, levels):
+                self.head.widths[level] = self.size + 1
+            self._levels = levels
+
+        node, pos = self.head, 0
+        for level in reversed(range(self._levels)):
+            # Last node before index on this level
+            while pos + node.widths[level] < index:
+                pos += node.widths[level]
+                node = node.skips[level]  # type: ignore
+
+            if level < levels:
+                new_node.skips[level] = node.skips[level]
+                new_node.widths[level] = pos + node.widths[level] + 1 - index
+                node.skips[level] = new_node
+                node.widths[level] = index - pos
+            else:
+                node.widths[level] += 1
+
+    def _index_remove(self, old_node: Node, index: int):
+        """Removes old_node, which was at index, from the index levels"""
+        node, pos = self.head, 0
+        for level in reversed(range(self._levels)):
+            while pos + node.widths[level] < index:
+                pos += node.widths[level]
+                node = node.skips[level]  # type: ignore
 
-    def _insert_after(self, pointer: Node, value: str):
-        """Function to insert a node with value after pointer"""
+            if node.skips[level] is old_node:
+                node.widths[level] += old_node.widths[level] - 1
+                node.skips[level] = old_node.skips[level]
+            else:
+                node.widths[level] -= 1
+
+    def _select(self, index: int) -> Node:
+        """Node at index, from 0 (head) to size + 1 (tail)"""
+        node, pos = self.head, 0
+        for level in reversed(range(self._levels)):
+            while pos + node.widths[level] <= index:
+                pos += node.widths[level]
+                node = node.skips[level]  # type: ignore
+
+        # Whatever is left is shorter than any skip
+        while pos < index:
+            pos += 1
+            node = node.next  # type: ignore
+        return node
+
+    def _insert_after(self, pointer: Node, index: int, value: str):
+        """Function to insert a node with value after pointer (at index)"""
         # Prevent inserting after tail
         if pointer == self.tail:
             raise IndexError("Insertion out of bound error")
 
         # Create the node with appropriate prev and next
-        new_node = Node(value, pointer, pointer.next)
+        new_node = Node(value, pointer, pointer.next, self._random_levels())
 
         # Set next's prev to new node if defined
         if pointer.next:
             pointer.next.previous = new_node
 
-        # Set current's next as new node and inc size
+        # Set current's next as new node, index, render and inc size
         pointer.next = new_node
+        self._index_insert(new_node, index + 1)
+        self._rope.insert(index, value)
+        if self.pointer_index > index:
+            self.pointer_index += 1
         self.size += 1
 
-    def _insert_before(self, pointer: Node, value: str):
+    def _insert_before(self, pointer: Node, index: int, value: str):
         # Prevent inserting before head
         if pointer == self.head:
             raise IndexError("Insertion out of bound error")
 
         # Create the node with appropriate prev and next
-        new_node = Node(value, pointer.previous, pointer)
+        new_node = Node(value, pointer.previous, pointer, self._random_levels())
 
         # Set prev's next to new node if defined
         if pointer.previous:
             pointer.previous.next = new_node
 
-        # Set current's next as new node and inc size
+        # Set current's next as new node, index, render and inc size
         pointer.previous = new_node
+        self._index_insert(new_node, index)
+        self._rope.insert(index - 1, value)
+        if self.pointer_index >= index:
+            self.pointer_index += 1
         self.size += 1
 
-    def _remove(self, pointer: Node):
+    def _remove(self, pointer: Node, index: int):
         # Prevent removing head or tail
         if pointer == self.head or pointer == self.tail:
             raise ValueError("Unable to remove head or tail")
@@ -103,41 +536,134 @@ class DoublyLinkedList:
         if pointer.next:
             pointer.next.previous = pointer.previous
 
-        # Dec size
+        # Unindex, unrender and dec size, callers take care of the pointer
+        self._index_remove(pointer, index)
+        self._rope.remove(index - 1)
+        if self.pointer_index > index:
+            self.pointer_index -= 1
         self.size -= 1
 
+    def _index_insert_run(self, new_nodes: List[Node], index: int):
+        """Adds new_nodes, now at index, index + 1, ..., to the index levels.
+
+        Same as `_index_insert` for each node, but the last node before the
+        run is only searched once: every new node becomes the last node
+        before the rest of the run on its own levels."""
+        levels = max(len(node.skips) for node in new_nodes)
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                self.head.widths[level] = self.size + 1
+            self._levels = levels
+
+        # Last node before the run on every level, its position, and where
+        # the node after it ends up once the whole run is in
+        last: List[Node] = [self.head] * self._levels
+        last_pos = [0] * self._levels
+        next_pos = [0] * self._levels
+        node, pos = self.head, 0
+        for level in reversed(range(self._levels)):
+            while pos + node.widths[level] < index:
+                pos += node.widths[level]
+                node = node.skips[level]  # type: ignore
+            last[level], last_pos[level] = node, pos
+            next_pos[level] = pos + node.widths[level] + len(new_nodes)
+
+        for new_index, new_node in enumerate(new_nodes, index):
+            for level in range(len(new_node.skips)):
+                node = last[level]
+                new_node.skips[level] = node.skips[level]
+                node.skips[level] = new_node
+                node.widths[level] = new_index - last_pos[level]
+                last[level], last_pos[level] = new_node, new_index
+
+        for level in range(self._levels):
+            last[level].widths[level] = next_pos[level] - last_pos[level]
+
+    def _index_remove_run(self, index: int, count: int):
+        """Removes the count nodes from index onward from the index levels"""
+        node, pos = self.head, 0
+        for level in reversed(range(self._levels)):
+            while pos + node.widths[level] < index:
+                pos += node.widths[level]
+                node = node.skips[level]  # type: ignore
+
+            # Skip over every removed node on this level
+            next_node, next_pos = node.skips[level], pos + node.widths[level]
+            while next_pos < index + count:
+                next_pos += next_node.widths[level]  # type: ignore
+                next_node = next_node.skips[level]  # type: ignore
+            node.skips[level] = next_node
+            node.widths[level] = next_pos - count - pos
+
+    def _insert_run(self, index: int, values: Sequence[str]):
+        previous = self._select(index - 1)
+        next_node = previous.next
+
+        # Build the whole segment, then link it in at once
+        new_nodes = []
+        for value in values:
+            new_node = Node(value, previous, None, self._random_levels())
+            previous.next = new_node
+            new_nodes.append(new_node)
+            previous = new_node
+        previous.next = next_node
+        next_node.previous = previous  # type: ignore
+
+        self._index_insert_run(new_nodes, index)
+        self._rope.insert_many(index - 1, values)
+        if self.pointer_index >= index:
+            self.pointer_index += len(values)
+        self.size += len(values)
+
+    def _remove_run(self, index: int, count: int):
+        first = self._select(index)
+        last = first
+        for _ in range(count - 1):
+            last = last.next  # type: ignore
+
+        first.previous.next = last.next  # type: ignore
+        last.next.previous = first.previous  # type: ignore
+
+        self._index_remove_run(index, count)
+        self._rope.remove_many(index - 1, count)
+        if self.pointer_index > index:
+            self.pointer_index -= count
+        self.size -= count
+
     def insert_head(self, value: str):
         """Inserts a node after head"""
-        self._insert_after(self.head, value)
+        self._insert_after(self.head, 0, value)
 
     def insert_tail(self, value: str):
         """Inserts a node before tail"""
-        self._insert_before(self.tail, value)
+        self._insert_before(self.tail, self.size + 1, value)
 
     def remove_head(self):
         """Removes node after the head"""
         to_remove = self.head.next
-        self._remove(to_remove)  # type: ignore
+        self._remove(to_remove, 1)  # type: ignore
 
         # If we were removing current pointer, shift pointer to head
         if to_remove == self.pointer:
             self.pointer = self.head
+            self.pointer_index = 0
 
     def remove_tail(self):
         """Removes node before the tail"""
         to_remove = self.tail.previous
-        self._remove(to_remove)  # type: ignore
+        self._remove(to_remove, self.size)  # type: ignore
 
         # If we were removing current pointer, shift pointer to tail
         if to_remove == self.pointer:
             self.pointer = self.tail
+            self.pointer_index = self.size + 1
 
     def insert_pointer(self, arrow: ArrowValue, value: str):
         """Inserts node based on pointer and arrow"""
         if arrow == "NEXT":
-            self._insert_after(self.pointer, value)
+            self._insert_after(self.pointer, self.pointer_index, value)
         else:
-            self._insert_before(self.pointer, value)
+            self._insert_before(self.pointer, self.pointer_index, value)
 
     def remove_pointer(self, arrow: ArrowValue):
         """Removes node pointed by arrow with current pointer"""
@@ -147,38 +673,810 @@ class DoublyLinkedList:
                 raise ValueError("Tail do not have next node")
 
             pointer_remove = self.pointer.next
+            index = self.pointer_index + 1
         else:
             # Head will always have None as prev, prevent removal
             if self.pointer == self.head:
                 raise ValueError("Head do not have previous node")
 
             pointer_remove = self.pointer.previous
+            index = self.pointer_index - 1
 
-        self._remove(pointer_remove)  # type: ignore
+        self._remove(pointer_remove, index)  # type: ignore
 
     def move_pointer(self, arrow: ArrowValue, steps: int):
         """Moves pointer for steps in arrow direction"""
         # TODO: this should not happen
         steps = int(steps)
 
-        # Run for number of steps
-        for _ in range(steps):
-            # Select next pointer based on arrow
-            if arrow == "NEXT":
-                next_pointer = self.pointer.next
-            else:
-                next_pointer = self.pointer.previous
+        # Ensure we do not step out of bounds before moving at all
+        if arrow == "NEXT":
+            index = self.pointer_index + steps
+        else:
+            index = self.pointer_index - steps
+        if index < 0 or index > self.size + 1:
+            raise IndexError("Steps out of bound error")
+
+        if steps > WALK_STEPS:
+            self.pointer = self._select(index)
+        else:
+            # Run for number of steps
+            for _ in range(steps):
+                # Select next pointer based on arrow
+                if arrow == "NEXT":
+                    self.pointer = self.pointer.next  # type: ignore
+                else:
+                    self.pointer = self.pointer.previous  # type: ignore
+        self.pointer_index = index
+
+    def is_empty(self):
+        """Check if list is empty or not"""
+        return self.size == 0
+
+
+class GapBufferList(BulkCommands):
+    """Same commands as DoublyLinkedList, on a gap buffer of values.
+
+    Values live in one list with a gap of free slots, which is moved to
+    wherever the list is edited, so edits next to the last one (usually
+    around the pointer) are amortized O(1). Moving the gap costs one slice
+    copy of the values in between. Every value only takes a list slot, and
+    the pointer is just a position: 0 is the head, size + 1 the tail."""
+
+    __slots__ = ("pointer_index", "window", "_buffer", "_gap_start", "_gap_end")
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        self.pointer_index = 0
+        self.window = window
+
+        # Values of the nodes are _buffer[:_gap_start] + _buffer[_gap_end:]
+        self._buffer: List[Optional[str]] = [None] * GAP_MIN_CAPACITY
+        self._gap_start = 0
+        self._gap_end = GAP_MIN_CAPACITY
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer) - (self._gap_end - self._gap_start)
+
+    def __str__(self) -> str:
+        return self.render(self.window)
+
+    def _values(self, start: int, stop: int) -> List[str]:
+        """Values of the nodes from position start up to (not including)
+        stop, both between 1 and size + 1"""
+        gap_start, gap_end = self._gap_start, self._gap_end
+        start, stop = start - 1, stop - 1
+        if stop <= gap_start:
+            return self._buffer[start:stop]  # type: ignore
+        if start >= gap_start:
+            gap = gap_end - gap_start
+            return self._buffer[start + gap : stop + gap]  # type: ignore
+        return (
+            self._buffer[start:gap_start]
+            + self._buffer[gap_end : stop + gap_end - gap_start]
+        )  # type: ignore
+
+    def render(self, window: Optional[int] = None) -> str:
+        """Same as `DoublyLinkedList.render`"""
+        return render_window(
+            lambda start, stop: render_nodes(self._values(start, stop)),
+            self.pointer_index,
+            self.size,
+            window,
+        )
+
+    def _move_gap(self, index: int):
+        """Moves the gap so that it starts at index (a node position - 1)"""
+        buffer = self._buffer
+        gap_start, gap_end = self._gap_start, self._gap_end
+        gap = gap_end - gap_start
+        if index < gap_start:
+            moved = gap_start - index
+            buffer[gap_end - moved : gap_end] = buffer[index:gap_start]
+            # Slots the values were moved out of, the first ones of the gap
+            vacated = index
+        elif index > gap_start:
+            moved = index - gap_start
+            buffer[gap_start:index] = buffer[gap_end : gap_end + moved]
+            # Same, the last ones of the gap
+            vacated = max(gap_end, index)
+        else:
+            return
+
+        # Drop the references left there, only the moved slots can have
+        # any, so a short move stays cheap however big the gap is
+        count = min(moved, gap)
+        buffer[vacated : vacated + count] = [None] * count
+        self._gap_start, self._gap_end = index, index + gap
+
+    def _resize(self, capacity: int):
+        """Copies the values to a buffer of capacity slots, same gap start"""
+        buffer = self._buffer
+        after = buffer[self._gap_end :]
+        self._buffer = (
+            buffer[: self._gap_start]
+            + [None] * (capacity - self._gap_start - len(after))
+            + after
+        )
+        self._gap_end = capacity - len(after)
+
+    def _insert(self, index: int, value: str):
+        """Inserts a node with value at position index"""
+        if self._gap_start == self._gap_end:
+            self._resize(2 * len(self._buffer))
+        self._move_gap(index - 1)
+        self._buffer[self._gap_start] = value
+        self._gap_start += 1
+
+        if self.pointer_index >= index:
+            self.pointer_index += 1
+
+    def _remove(self, index: int):
+        """Removes the node at position index, callers take care of the
+        pointer if it was there"""
+        if index <= 0 or index > self.size:
+            raise ValueError("Unable to remove head or tail")
+
+        self._move_gap(index - 1)
+        self._buffer[self._gap_end] = None
+        self._gap_end += 1
+
+        if self.pointer_index > index:
+            self.pointer_index -= 1
+
+        # Give memory back once mostly empty
+        capacity = len(self._buffer)
+        if capacity > GAP_MIN_CAPACITY and self.size < capacity // 4:
+            self._resize(max(capacity // 2, GAP_MIN_CAPACITY))
+
+    def _insert_run(self, index: int, values: Sequence[str]):
+        count = len(values)
+        free = self._gap_end - self._gap_start
+        if free < count:
+            self._resize(max(2 * len(self._buffer), len(self._buffer) + count))
+        self._move_gap(index - 1)
+        self._buffer[self._gap_start : self._gap_start + count] = values
+        self._gap_start += count
+
+        if self.pointer_index >= index:
+            self.pointer_index += count
+
+    def _remove_run(self, index: int, count: int):
+        self._move_gap(index - 1)
+        self._buffer[self._gap_end : self._gap_end + count] = [None] * count
+        self._gap_end += count
+
+        if self.pointer_index > index:
+            self.pointer_index -= count
+
+        capacity = len(self._buffer)
+        if capacity > GAP_MIN_CAPACITY and self.size < capacity // 4:
+            self._resize(max(capacity // 2, GAP_MIN_CAPACITY))
+
+    def insert_head(self, value: str):
+        """Inserts a node after head"""
+        self._insert(1, value)
+
+    def insert_tail(self, value: str):
+        """Inserts a node before tail"""
+        self._insert(self.size + 1, value)
+
+    def remove_head(self):
+        """Removes node after the head"""
+        removes_pointer = self.pointer_index == 1
+        self._remove(1)
+
+        # If we were removing current pointer, shift pointer to head
+        if removes_pointer:
+            self.pointer_index = 0
+
+    def remove_tail(self):
+        """Removes node before the tail"""
+        # If we were removing current pointer, it is now at tail, which is
+        # the same position
+        self._remove(self.size)
+
+    def insert_pointer(self, arrow: ArrowValue, value: str):
+        """Inserts node based on pointer and arrow"""
+        pointer = self.pointer_index
+        if arrow == "NEXT":
+            if pointer == self.size + 1:
+                raise IndexError("Insertion out of bound error")
+            self._insert(pointer + 1, value)
+        else:
+            if pointer == 0:
+                raise IndexError("Insertion out of bound error")
+            self._insert(pointer, value)
 
-            # Ensure we do not step out of bounds by checking None
-            if next_pointer is None:
-                raise IndexError("Steps out of bound error")
-            self.pointer = next_pointer
+    def remove_pointer(self, arrow: ArrowValue):
+        """Removes node pointed by arrow with current pointer"""
+        pointer = self.pointer_index
+        if arrow == "NEXT":
+            if pointer == self.size + 1:
+                raise ValueError("Tail do not have next node")
+            self._remove(pointer + 1)
+        else:
+            if pointer == 0:
+                raise ValueError("Head do not have previous node")
+            self._remove(pointer - 1)
+
+    def move_pointer(self, arrow: ArrowValue, steps: int):
+        """Moves pointer for steps in arrow direction"""
+        steps = int(steps)
+        if arrow == "NEXT":
+            index = self.pointer_index + steps
+        else:
+            index = self.pointer_index - steps
+
+        # Ensure we do not step out of bounds
+        if index < 0 or index > self.size + 1:
+            raise IndexError("Steps out of bound error")
+        self.pointer_index = index
 
     def is_empty(self):
         """Check if list is empty or not"""
         return self.size == 0
 
 
+class ArenaList(BulkCommands):
+    """Same commands as DoublyLinkedList, on a pool of nodes.
+
+    A node is an integer slot in parallel columns: its value in a list, its
+    previous and next slots in arrays. Removed slots are chained into a
+    free list through the next column and reused by later inserts, so the
+    pool only allocates when it is full, by doubling. The list is rendered
+    through a ListRope, like DoublyLinkedList.
+
+    Unlike DoublyLinkedList, there is no index over the nodes: finding a
+    node by position walks the links from whichever of the pointer, head or
+    tail is the closest. `MOVE_POINTER` (and bulk edits away from the
+    pointer) cost O(distance), up to O(n) for a long jump. Use the linked,
+    gap or persistent backend for streams of long pointer moves."""
+
+    __slots__ = (
+        "pointer",
+        "pointer_index",
+        "size",
+        "window",
+        "_values",
+        "_previous",
+        "_next",
+        "_free",
+        "_rope",
+    )
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        # Head and tail take the first two slots, linked to each other
+        self._values: List[Optional[str]] = ["_HEAD", "_TAIL"]
+        self._previous = array("q", [NO_NODE, ARENA_HEAD])
+        self._next = array("q", [ARENA_TAIL, NO_NODE])
+        self._free = NO_NODE
+
+        self.pointer = ARENA_HEAD
+        self.pointer_index = 0
+        self.size = 0
+
+        self.window = window
+        self._rope = ListRope()
+
+    def __str__(self) -> str:
+        return self.render(self.window)
+
+    def render(self, window: Optional[int] = None) -> str:
+        """Same as `DoublyLinkedList.render`"""
+        return self._rope.render(self.pointer_index, window, "_HEAD", "_TAIL")
+
+    def _grow(self):
+        """Adds free slots, as many as there are already"""
+        start = len(self._values)
+        count = max(start, ARENA_MIN_GROWTH)
+        stop = start + count
+
+        self._values.extend([None] * count)
+        self._previous.extend([NO_NODE] * count)
+        # Chain the new slots in front of the free list
+        self._next.extend(range(start + 1, stop))
+        self._next.append(self._free)
+        self._free = start
+
+    def _allocate(self, value: str, previous: int, next: int) -> int:
+        """Takes a slot from the free list for a new node"""
+        if self._free == NO_NODE:
+            self._grow()
+
+        node = self._free
+        self._free = self._next[node]
+
+        self._values[node] = value
+        self._previous[node] = previous
+        self._next[node] = next
+        return node
+
+    def _release(self, node: int):
+        """Puts the slot of a removed node back on the free list"""
+        self._values[node] = None
+        self._previous[node] = NO_NODE
+        self._next[node] = self._free
+        self._free = node
+
+    def _node_at(self, index: int) -> int:
+        """Slot of the node at index, walked to from whichever of the
+        pointer, head or tail is the closest"""
+        node, links, count = self.pointer, self._next, index - self.pointer_index
+        if count < 0:
+            links, count = self._previous, -count
+        if index < count:
+            node, links, count = ARENA_HEAD, self._next, index
+        if self.size + 1 - index < count:
+            node, links, count = ARENA_TAIL, self._previous, self.size + 1 - index
+
+        for _ in range(count):
+            node = links[node]
+        return node
+
+    def _insert_after(self, node: int, index: int, value: str):
+        """Inserts a node with value after node, which is at index"""
+        # Prevent inserting after tail
+        if node == ARENA_TAIL:
+            raise IndexError("Insertion out of bound error")
+
+        next_node = self._next[node]
+        new_node = self._allocate(value, node, next_node)
+        self._previous[next_node] = new_node
+        self._next[node] = new_node
+
+        self._rope.insert(index, value)
+        if self.pointer_index > index:
+            self.pointer_index += 1
+        self.size += 1
+
+    def _insert_before(self, node: int, index: int, value: str):
+        """Inserts a node with value before node, which is at index"""
+        # Prevent inserting before head
+        if node == ARENA_HEAD:
+            raise IndexError("Insertion out of bound error")
+
+        previous_node = self._previous[node]
+        new_node = self._allocate(value, previous_node, node)
+        self._next[previous_node] = new_node
+        self._previous[node] = new_node
+
+        self._rope.insert(index - 1, value)
+        if self.pointer_index >= index:
+            self.pointer_index += 1
+        self.size += 1
+
+    def _remove(self, node: int, index: int):
+        """Removes node, which is at index, callers take care of the pointer"""
+        # Prevent removing head or tail
+        if node == ARENA_HEAD or node == ARENA_TAIL:
+            raise ValueError("Unable to remove head or tail")
+
+        previous_node, next_node = self._previous[node], self._next[node]
+        self._next[previous_node] = next_node
+        self._previous[next_node] = previous_node
+        self._release(node)
+
+        self._rope.remove(index - 1)
+        if self.pointer_index > index:
+            self.pointer_index -= 1
+        self.size -= 1
+
+    def _insert_run(self, index: int, values: Sequence[str]):
+        previous = ARENA_HEAD
+        if index > 1:
+            previous = self._previous[self._node_at(index)]
+        next_node = self._next[previous]
+
+        # Chain the new slots one after the other, then link the run in
+        for value in values:
+            new_node = self._allocate(value, previous, NO_NODE)
+            self._next[previous] = new_node
+            previous = new_node
+        self._next[previous] = next_node
+        self._previous[next_node] = previous
+
+        self._rope.insert_many(index - 1, values)
+        if self.pointer_index >= index:
+            self.pointer_index += len(values)
+        self.size += len(values)
+
+    def _remove_run(self, index: int, count: int):
+        node = self._node_at(index)
+        previous = self._previous[node]
+        for _ in range(count):
+            next_node = self._next[node]
+            self._release(node)
+            node = next_node
+        self._next[previous] = node
+        self._previous[node] = previous
+
+        self._rope.remove_many(index - 1, count)
+        if self.pointer_index > index:
+            self.pointer_index -= count
+        self.size -= count
+
+    def insert_head(self, value: str):
+        """Inserts a node after head"""
+        self._insert_after(ARENA_HEAD, 0, value)
+
+    def insert_tail(self, value: str):
+        """Inserts a node before tail"""
+        self._insert_before(ARENA_TAIL, self.size + 1, value)
+
+    def remove_head(self):
+        """Removes node after the head"""
+        to_remove = self._next[ARENA_HEAD]
+        self._remove(to_remove, 1)
+
+        # If we were removing current pointer, shift pointer to head
+        if to_remove == self.pointer:
+            self.pointer = ARENA_HEAD
+            self.pointer_index = 0
+
+    def remove_tail(self):
+        """Removes node before the tail"""
+        to_remove = self._previous[ARENA_TAIL]
+        self._remove(to_remove, self.size)
+
+        # If we were removing current pointer, shift pointer to tail
+        if to_remove == self.pointer:
+            self.pointer = ARENA_TAIL
+            self.pointer_index = self.size + 1
+
+    def insert_pointer(self, arrow: ArrowValue, value: str):
+        """Inserts node based on pointer and arrow"""
+        if arrow == "NEXT":
+            self._insert_after(self.pointer, self.pointer_index, value)
+        else:
+            self._insert_before(self.pointer, self.pointer_index, value)
+
+    def remove_pointer(self, arrow: ArrowValue):
+        """Removes node pointed by arrow with current pointer"""
+        if arrow == "NEXT":
+            if self.pointer == ARENA_TAIL:
+                raise ValueError("Tail do not have next node")
+            self._remove(self._next[self.pointer], self.pointer_index + 1)
+        else:
+            if self.pointer == ARENA_HEAD:
+                raise ValueError("Head do not have previous node")
+            self._remove(self._previous[self.pointer], self.pointer_index - 1)
+
+    def move_pointer(self, arrow: ArrowValue, steps: int):
+        """Moves pointer for steps in arrow direction, walking the nodes in
+        O(min(steps, distance to head or tail)), see `_node_at`"""
+        steps = int(steps)
+        if arrow == "NEXT":
+            index = self.pointer_index + steps
+        else:
+            index = self.pointer_index - steps
+
+        # Ensure we do not step out of bounds before moving at all
+        if index < 0 or index > self.size + 1:
+            raise IndexError("Steps out of bound error")
+
+        self.pointer = self._node_at(index)
+        self.pointer_index = index
+
+    def is_empty(self):
+        """Check if list is empty or not"""
+        return self.size == 0
+
+
+class TreeNode:
+    """Node of an immutable AVL tree of values, ordered by position.
+
+    Nodes are never changed once built, an edit copies the nodes on the
+    path to the change and shares every other subtree with the old tree,
+    so both stay valid."""
+
+    __slots__ = ("value", "left", "right", "height", "size")
+
+    def __init__(
+        self,
+        left: Optional["TreeNode"],
+        value: str,
+        right: Optional["TreeNode"],
+    ) -> None:
+        self.value = value
+        self.left = left
+        self.right = right
+
+        # Same as tree_height and tree_size, inlined as every edit builds
+        # O(log n) nodes
+        height, size = 1, 1
+        if left is not None:
+            height, size = left.height + 1, left.size + 1
+        if right is not None:
+            height = max(height, right.height + 1)
+            size += right.size
+        self.height = height
+        self.size = size
+
+
+def tree_height(tree: Optional[TreeNode]) -> int:
+    return tree.height if tree is not None else 0
+
+
+def tree_size(tree: Optional[TreeNode]) -> int:
+    return tree.size if tree is not None else 0
+
+
+def tree_rotate_left(tree: TreeNode) -> TreeNode:
+    right = tree.right
+    assert right is not None
+    return TreeNode(
+        TreeNode(tree.left, tree.value, right.left), right.value, right.right
+    )
+
+
+def tree_rotate_right(tree: TreeNode) -> TreeNode:
+    left = tree.left
+    assert left is not None
+    return TreeNode(left.left, left.value, TreeNode(left.right, tree.value, tree.right))
+
+
+def tree_join_right(left: TreeNode, value: str, right: Optional[TreeNode]) -> TreeNode:
+    """`tree_join` when left is more than one level higher than right"""
+    inner = left.right
+    if tree_height(inner) <= tree_height(right) + 1:
+        joined = TreeNode(inner, value, right)
+        if joined.height <= tree_height(left.left) + 1:
+            return TreeNode(left.left, left.value, joined)
+        return tree_rotate_left(
+            TreeNode(left.left, left.value, tree_rotate_right(joined))
+        )
+
+    assert inner is not None
+    joined = tree_join_right(inner, value, right)
+    tree = TreeNode(left.left, left.value, joined)
+    if joined.height <= tree_height(left.left) + 1:
+        return tree
+    return tree_rotate_left(tree)
+
+
+def tree_join_left(left: Optional[TreeNode], value: str, right: TreeNode) -> TreeNode:
+    """`tree_join` when right is more than one level higher than left"""
+    inner = right.left
+    if tree_height(inner) <= tree_height(left) + 1:
+        joined = TreeNode(left, value, inner)
+        if joined.height <= tree_height(right.right) + 1:
+            return TreeNode(joined, right.value, right.right)
+        return tree_rotate_right(
+            TreeNode(tree_rotate_left(joined), right.value, right.right)
+        )
+
+    assert inner is not None
+    joined = tree_join_left(left, value, inner)
+    tree = TreeNode(joined, right.value, right.right)
+    if joined.height <= tree_height(right.right) + 1:
+        return tree
+    return tree_rotate_right(tree)
+
+
+def tree_join(
+    left: Optional[TreeNode], value: str, right: Optional[TreeNode]
+) -> TreeNode:
+    """Tree of the values of left, then value, then the values of right, in
+    O(difference of their heights)"""
+    if tree_height(left) > tree_height(right) + 1:
+        assert left is not None
+        return tree_join_right(left, value, right)
+    if tree_height(right) > tree_height(left) + 1:
+        assert right is not None
+        return tree_join_left(left, value, right)
+    return TreeNode(left, value, right)
+
+
+def tree_split(
+    tree: Optional[TreeNode], count: int
+) -> Tuple[Optional[TreeNode], Optional[TreeNode]]:
+    """Trees of the first count values of tree and of the rest, O(log n)"""
+    if tree is None:
+        return None, None
+
+    left_size = tree_size(tree.left)
+    if count <= left_size:
+        first, rest = tree_split(tree.left, count)
+        return first, tree_join(rest, tree.value, tree.right)
+    first, rest = tree_split(tree.right, count - left_size - 1)
+    return tree_join(tree.left, tree.value, first), rest
+
+
+def tree_split_last(tree: TreeNode) -> Tuple[Optional[TreeNode], str]:
+    """Tree without its last value, and that value"""
+    if tree.right is None:
+        return tree.left, tree.value
+    rest, value = tree_split_last(tree.right)
+    return tree_join(tree.left, tree.value, rest), value
+
+
+def tree_concat(
+    left: Optional[TreeNode], right: Optional[TreeNode]
+) -> Optional[TreeNode]:
+    """Tree of the values of left, then the values of right, O(log n)"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    rest, value = tree_split_last(left)
+    return tree_join(rest, value, right)
+
+
+def tree_build(values: Sequence[str], start: int, stop: int) -> Optional[TreeNode]:
+    """Balanced tree of values[start:stop], O(stop - start)"""
+    if start >= stop:
+        return None
+    mid = (start + stop) // 2
+    return TreeNode(
+        tree_build(values, start, mid), values[mid], tree_build(values, mid + 1, stop)
+    )
+
+
+def tree_values(tree: Optional[TreeNode], start: int, stop: int, out: List[str]):
+    """Appends the values from index start up to (not including) stop to
+    out, only visiting the subtrees holding some of them"""
+    if tree is None or start >= stop:
+        return
+
+    left_size = tree_size(tree.left)
+    if start < left_size:
+        tree_values(tree.left, start, min(stop, left_size), out)
+    if start <= left_size < stop:
+        out.append(tree.value)
+    if stop > left_size + 1:
+        tree_values(
+            tree.right, max(start - left_size - 1, 0), stop - left_size - 1, out
+        )
+
+
+# Root of the tree and pointer position, the whole state of a PersistentList
+ListVersion = Tuple[Optional[TreeNode], int]
+
+
+class PersistentList(BulkCommands):
+    """Same commands as DoublyLinkedList, on a persistent tree of values.
+
+    Values are kept in an immutable balanced tree (see `TreeNode`), where
+    every edit builds a new root in O(log n) time and O(log n) new nodes,
+    sharing the rest with the previous version. A version is just a root
+    and a pointer position, so taking a snapshot is O(1) and going back to
+    one is O(1), without any copy of the list."""
+
+    __slots__ = ("root", "pointer_index", "window", "_snapshots")
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        self.root: Optional[TreeNode] = None
+        self.pointer_index = 0
+        self.window = window
+        self._snapshots: List[ListVersion] = []
+
+    @property
+    def size(self) -> int:
+        return tree_size(self.root)
+
+    def __str__(self) -> str:
+        return self.render(self.window)
+
+    def _values(self, start: int, stop: int) -> List[str]:
+        """Same as `GapBufferList._values`"""
+        values: List[str] = []
+        tree_values(self.root, start - 1, stop - 1, values)
+        return values
+
+    def render(self, window: Optional[int] = None) -> str:
+        """Same as `DoublyLinkedList.render`"""
+        return render_window(
+            lambda start, stop: render_nodes(self._values(start, stop)),
+            self.pointer_index,
+            self.size,
+            window,
+        )
+
+    def snapshot(self):
+        """Saves the current version of the list"""
+        self._snapshots.append((self.root, self.pointer_index))
+
+    def undo(self, steps: int):
+        """Goes back to the version saved by the steps-th latest snapshot.
+
+        Later snapshots are dropped, that one is kept so that it can be
+        gone back to again."""
+        steps = int(steps)
+        if steps > len(self._snapshots):
+            raise IndexError("Undo out of bound error")
+
+        del self._snapshots[len(self._snapshots) - steps + 1 :]
+        self.root, self.pointer_index = self._snapshots[-1]
+
+    def _insert_run(self, index: int, values: Sequence[str]):
+        before, after = tree_split(self.root, index - 1)
+        # Joined around the middle value, so that a single value is only
+        # one join
+        mid = len(values) // 2
+        self.root = tree_join(
+            tree_concat(before, tree_build(values, 0, mid)),
+            values[mid],
+            tree_concat(tree_build(values, mid + 1, len(values)), after),
+        )
+
+        if self.pointer_index >= index:
+            self.pointer_index += len(values)
+
+    def _remove_run(self, index: int, count: int):
+        before, rest = tree_split(self.root, index - 1)
+        _, after = tree_split(rest, count)
+        self.root = tree_concat(before, after)
+
+        if self.pointer_index > index:
+            self.pointer_index -= count
+
+    def insert_head(self, value: str):
+        """Inserts a node after head"""
+        self._insert_run(1, (value,))
+
+    def insert_tail(self, value: str):
+        """Inserts a node before tail"""
+        self._insert_run(self.size + 1, (value,))
+
+    def remove_head(self):
+        """Removes node after the head"""
+        if self.size == 0:
+            raise ValueError("Unable to remove head or tail")
+
+        removes_pointer = self.pointer_index == 1
+        self._remove_run(1, 1)
+
+        # If we were removing current pointer, shift pointer to head
+        if removes_pointer:
+            self.pointer_index = 0
+
+    def remove_tail(self):
+        """Removes node before the tail"""
+        if self.size == 0:
+            raise ValueError("Unable to remove head or tail")
+
+        # If we were removing current pointer, it is now at tail, which is
+        # the same position
+        self._remove_run(self.size, 1)
+
+    def insert_pointer(self, arrow: ArrowValue, value: str):
+        """Inserts node based on pointer and arrow"""
+        self.insert_pointer_many(arrow, (value,))
+
+    def remove_pointer(self, arrow: ArrowValue):
+        """Removes node pointed by arrow with current pointer"""
+        self.remove_pointer_many(arrow, 1)
+
+    def move_pointer(self, arrow: ArrowValue, steps: int):
+        """Same as `GapBufferList.move_pointer`"""
+        steps = int(steps)
+        if arrow == "NEXT":
+            index = self.pointer_index + steps
+        else:
+            index = self.pointer_index - steps
+
+        # Ensure we do not step out of bounds
+        if index < 0 or index > self.size + 1:
+            raise IndexError("Steps out of bound error")
+        self.pointer_index = index
+
+    def is_empty(self):
+        """Check if list is empty or not"""
+        return self.size == 0
+
+
+ListBackend = Union[DoublyLinkedList, GapBufferList, ArenaList, PersistentList]
+
+# Backends that can be picked at startup
+BACKENDS: Dict[str, Callable[[Optional[int]], ListBackend]] = {
+    "linked": DoublyLinkedList,
+    "gap": GapBufferList,
+    "arena": ArenaList,
+    "persistent": PersistentList,
+}
+
+
 def validate_arrow(value: str):
     """Validates arrow value"""
     return value == "PREV" or value == "NEXT"
@@ -189,95 +1487,182 @@ def validate_int(value: str):
     return int(value) > 0
 
 
+# Spec of the arguments of each command, in the following pattern:
+# (num_of_args, (validator_func1, validator_func2, ..., validator_funcn))
+VALIDATORS: Dict[str, Tuple[int, Tuple[Callable, ...]]] = {
+    "INSERT_HEAD": (1, (str,)),
+    "REMOVE_HEAD": (0, ()),
+    "INSERT_TAIL": (1, (str,)),
+    "REMOVE_TAIL": (0, ()),
+    "INSERT_NODE_USING_POINTER": (2, (validate_arrow, str)),
+    "REMOVE_NODE_USING_POINTER": (1, (validate_arrow,)),
+    "MOVE_POINTER": (2, (validate_arrow, validate_int)),
+    "REMOVE_NODES_USING_POINTER": (2, (validate_arrow, validate_int)),
+    "IS_EMPTY": (0, ()),
+    "SIZE": (0, ()),
+    "SNAPSHOT": (0, ()),
+    "UNDO": (1, (validate_int,)),
+}
+
+# Same for commands taking any number of values, at least num_of_args, the
+# last validator checks every extra argument
+VARIADIC_VALIDATORS: Dict[str, Tuple[int, Tuple[Callable, ...]]] = {
+    "EXTEND_HEAD": (1, (str,)),
+    "EXTEND_TAIL": (1, (str,)),
+    "INSERT_NODES_USING_POINTER": (2, (validate_arrow, str)),
+}
+
+# Size of the output buffer of main, in bytes
+OUTPUT_BUFFER = 1 << 20
+
+
 def validate_args(cmd: str, args: List[str]):
     """Validates arguments based on cmd"""
-    # Dictionary to standardize the spec for each argument
-    # Value is formatted in the following pattern:
-    # (num_of_args, [validator_func1, validator_func2, ..., validator_funcn])
-    validators: Dict[str, Tuple[int, List[Callable]]] = {
-        "INSERT_HEAD": (1, [str]),
-        "REMOVE_HEAD": (0, []),
-        "INSERT_TAIL": (1, [str]),
-        "REMOVE_TAIL": (0, []),
-        "INSERT_NODE_USING_POINTER": (2, [validate_arrow, str]),
-        "REMOVE_NODE_USING_POINTER": (1, [validate_arrow]),
-        "MOVE_POINTER": (2, [validate_arrow, validate_int]),
-        "IS_EMPTY": (0, []),
-        "SIZE": (0, []),
-    }
-
     # Get validation spec, if none then there is no such command
-    validation_data = validators.get(cmd)
-    if not validation_data:
-        return False
-
-    # Check arguments length
-    if len(args) != validation_data[0]:
-        return False
+    validation_data = VALIDATORS.get(cmd)
+    if validation_data:
+        validators = validation_data[1]
+        # Check arguments length
+        if len(args) != validation_data[0]:
+            return False
+    else:
+        validation_data = VARIADIC_VALIDATORS.get(cmd)
+        if not validation_data:
+            return False
+        # Check arguments length, the last validator repeats for the rest
+        if len(args) < validation_data[0]:
+            return False
+        validators = chain(validation_data[1], repeat(validation_data[1][-1]))
 
     # For every argument, check if it's valid
-    for i, validator in enumerate(validation_data[1]):
+    for validator, arg in zip(validators, args):
         # If any is invalid, just return False
-        if not validator(args[i]):
+        if not validator(arg):
             return False
 
     # All good :)
     return True
 
 
-def process_cmd(dlist: DoublyLinkedList, cmd: str, args: List[str]):
-    """Processes command with given args"""
-    # Translation table for function to call on each command
-    cmds: Dict[str, Callable] = {
-        "INSERT_HEAD": dlist.insert_head,
-        "REMOVE_HEAD": dlist.remove_head,
-        "INSERT_TAIL": dlist.insert_tail,
-        "REMOVE_TAIL": dlist.remove_tail,
-        "INSERT_NODE_USING_POINTER": dlist.insert_pointer,
-        "REMOVE_NODE_USING_POINTER": dlist.remove_pointer,
-        "MOVE_POINTER": dlist.move_pointer,
-        "IS_EMPTY": dlist.is_empty,
-        "SIZE": lambda: dlist.size,
-    }
-
-    print(cmd, *args)
-    if cmd == "SIZE" or cmd == "IS_EMPTY":
-        # Simply print size and upper (because IS_EMPTY)
-        print(f"    {cmds[cmd]()}".upper())
-        return
+class CommandEngine:
+    """Runs commands on a list and writes their transcript to out.
 
-    # Print original list
-    print("    Before: ")
-    print(f"    {dlist}")
-    print()
+    The table of functions to call on each command is built once, and the
+    list is only rendered again after it changed: the "Before" dump of a
+    command is the "After" dump of the last command that succeeded, as
+    failing commands never change the list."""
 
-    # Validate and check for syntax errors
-    if not validate_args(cmd, args):
-        print("    Syntax error")
-        return
+    def __init__(self, dlist: ListBackend, out: TextIO):
+        self.dlist = dlist
+        self.out = out
 
-    # Get command function and run it
-    cmd_func = cmds[cmd]
-    try:
-        cmd_func(*args)
+        # Translation table for function to call on each command
+        self._cmds: Dict[str, Callable] = {
+            "INSERT_HEAD": dlist.insert_head,
+            "REMOVE_HEAD": dlist.remove_head,
+            "INSERT_TAIL": dlist.insert_tail,
+            "REMOVE_TAIL": dlist.remove_tail,
+            "INSERT_NODE_USING_POINTER": dlist.insert_pointer,
+            "REMOVE_NODE_USING_POINTER": dlist.remove_pointer,
+            "MOVE_POINTER": dlist.move_pointer,
+            "IS_EMPTY": dlist.is_empty,
+            "SIZE": lambda: dlist.size,
+            "EXTEND_HEAD": lambda *values: dlist.extend_head(values),
+            "EXTEND_TAIL": lambda *values: dlist.extend_tail(values),
+            "INSERT_NODES_USING_POINTER": (
+                lambda arrow, *values: dlist.insert_pointer_many(arrow, values)
+            ),
+            "REMOVE_NODES_USING_POINTER": dlist.remove_pointer_many,
+        }
+        # Only the persistent backend keeps old versions around
+        if isinstance(dlist, PersistentList):
+            self._cmds["SNAPSHOT"] = dlist.snapshot
+            self._cmds["UNDO"] = dlist.undo
+        else:
+            self._cmds["SNAPSHOT"] = self._cmds["UNDO"] = self._no_snapshots
+        self._dump: Optional[str] = None
+
+    def _no_snapshots(self, *args: str):
+        raise ValueError("Snapshots need the persistent backend")
+
+    def process(self, cmd: str, args: List[str]):
+        """Processes command with given args"""
+        write = self.out.write
+        write(" ".join([cmd, *args]) + "\n")
+        if cmd == "SIZE" or cmd == "IS_EMPTY":
+            # Simply print size and upper (because IS_EMPTY)
+            write(f"    {self._cmds[cmd]()}\n".upper())
+            return
 
-        print("    After: ")
-        print(f"    {dlist}")
-    except Exception as e:
-        # Any exception happens here, simply str() it
-        # Should be guaranteed that it is our own exceptions tho
-        print("    " + str(e))
+        # Print original list
+        if self._dump is None:
+            self._dump = str(self.dlist)
+        write(f"    Before: \n    {self._dump}\n\n")
+
+        # Validate and check for syntax errors
+        if not validate_args(cmd, args):
+            write("    Syntax error\n")
+            return
+
+        # Get command function and run it
+        try:
+            self._cmds[cmd](*args)
+        except Exception as e:
+            # Any exception happens here, simply str() it
+            # Should be guaranteed that it is our own exceptions tho
+            write(f"    {e}\n")
+            return
+
+        self._dump = str(self.dlist)
+        write(f"    After: \n    {self._dump}\n")
+
+    def run(self, lines: Iterable[str]):
+        """Processes every line until EXIT, same as typing them in. Blank
+        lines (like the one after the last newline) are skipped."""
+        for line in lines:
+            if line == "EXIT":
+                return
+
+            words = line.split()
+            if not words:
+                continue
+
+            cmd, *args = words
+            self.process(cmd, args)
+            self.out.write("\n")
+
+
+def process_cmd(dlist: ListBackend, cmd: str, args: List[str]):
+    """Processes command with given args, see `CommandEngine.process`"""
+    CommandEngine(dlist, sys.stdout).process(cmd, args)
 
 
 def main():
-    dlist = DoublyLinkedList()
-    inp = input()
-    while inp != "EXIT":
-        cmd, *args = inp.split()
-        process_cmd(dlist, cmd, args)
-
-        print()
-        inp = input()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--window",
+        type=int,
+        metavar="N",
+        help="only print the nodes at most N positions away from the pointer",
+    )
+    parser.add_argument("--backend", choices=tuple(BACKENDS), default="linked")
+    opts = parser.parse_args()
+
+    dlist = BACKENDS[opts.backend](opts.window)
+
+    # Read every command at once, and write through one big buffer
+    lines = sys.stdin.read().split("\n")
+    out = open(
+        sys.stdout.fileno(),
+        "w",
+        buffering=OUTPUT_BUFFER,
+        encoding=sys.stdout.encoding,
+        closefd=False,
+    )
+    try:
+        CommandEngine(dlist, out).run(lines)
+    finally:
+        out.flush()
 
 
 if __name__ == "__main__":